@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+# Add the parent directory to the path so we can import our package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from insurance_triage.utils.config_loader import ConfigLoader
+from insurance_triage.utils.work_queue import SQLiteWorkQueue
+from insurance_triage.worker import run_worker_pool
+from insurance_triage.dispatch import DispatchStage
+
+def main():
+    parser = argparse.ArgumentParser(description="Triage emails with a pool of workers sharing one queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add emails from a JSON file to the queue")
+    enqueue_parser.add_argument("emails_file", help="JSON list of emails (content, sender, subject, ...)")
+
+    work_parser = subparsers.add_parser("work", help="Start worker processes")
+    work_parser.add_argument("--workers", type=int, help="Number of worker processes")
+    work_parser.add_argument("--forever", action="store_true", help="Keep polling after the queue drains")
+
+    subparsers.add_parser("results", help="Write completed results to queue_results.json")
+    subparsers.add_parser("dispatch", help="Write completed results to the per-team outboxes")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    config_loader = ConfigLoader()
+    config = config_loader.load_config('config.yaml')
+    worker_config = config.get('worker', {})
+    queue_path = worker_config.get('queue_path', 'triage_queue.db')
+    queue = SQLiteWorkQueue(
+        queue_path,
+        visibility_timeout=worker_config.get('visibility_timeout_seconds', 300),
+        max_attempts=worker_config.get('max_attempts', 5),
+        retriage_backoff=worker_config.get('retriage_backoff_seconds', 30)
+    )
+
+    if args.command == "enqueue":
+        with open(args.emails_file, "r") as f:
+            emails = json.load(f)
+        added = sum(1 for email in emails if queue.enqueue(email))
+        print(f"Enqueued {added} new emails ({len(emails) - added} already queued)")
+
+    elif args.command == "work":
+        queue.close()
+        counts = run_worker_pool(
+            queue_path,
+            args.workers or worker_config.get('num_workers', 4),
+            visibility_timeout=worker_config.get('visibility_timeout_seconds', 300),
+            max_attempts=worker_config.get('max_attempts', 5),
+            retriage_backoff=worker_config.get('retriage_backoff_seconds', 30),
+            poll_interval=worker_config.get('poll_interval_seconds', 1.0),
+            stop_when_empty=not args.forever
+        )
+        print(f"Workers processed {sum(counts)} emails: {counts}")
+
+    elif args.command == "results":
+        results = dict(queue.results())
+        with open("queue_results.json", "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Queue status: {queue.stats()}")
+        print("Results saved to queue_results.json")
+
+    elif args.command == "dispatch":
+        # Replays are safe: outbox entries are keyed per email
+        dispatcher = DispatchStage.from_config(config.get('dispatch', {}), config_loader.config_dir)
+        written = dispatcher.dispatch([result for _, result in queue.results()])
+        dispatcher.close()
+        print(f"New outbox entries per team: {written}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import argparse
+
+# Add the parent directory to the path so we can import our package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from insurance_triage.utils.config_loader import ConfigLoader
+from insurance_triage.evaluation import (
+    ShadowEvaluator, RecordedCrewTier, load_corpus, rules_tier, classifier_tier, format_report
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare triage tiers on a labeled corpus, fully offline.")
+    parser.add_argument("corpus", help="JSONL file of labeled emails (id, content, email_type, urgency)")
+    parser.add_argument("--crew-recordings", help="JSONL of recorded crew responses to replay")
+    parser.add_argument("--classifier-model", help="Trained EmailClassifier model (.npz)")
+    parser.add_argument("--output", default="evaluation_report.json")
+    args = parser.parse_args()
+
+    evaluation_config = ConfigLoader().load_config('config.yaml').get('evaluation', {})
+
+    # Assemble the tiers to compare
+    tiers = {"rules": rules_tier}
+    if args.classifier_model:
+        from insurance_triage.tools.email_classifier import EmailClassifier
+        tiers["classifier"] = classifier_tier(EmailClassifier.load(args.classifier_model))
+    if args.crew_recordings:
+        tiers["crew"] = RecordedCrewTier(args.crew_recordings)
+
+    evaluator = ShadowEvaluator(
+        tiers,
+        reference_tier="crew" if "crew" in tiers else None,
+        max_workers=evaluation_config.get('max_workers', 8),
+        prompt_token_cost=evaluation_config.get('prompt_token_cost', 0.0),
+        completion_token_cost=evaluation_config.get('completion_token_cost', 0.0)
+    )
+
+    corpus = load_corpus(args.corpus)
+    print(f"Evaluating {len(corpus)} emails across tiers: {', '.join(tiers)}")
+    report = evaluator.run(corpus)
+
+    print()
+    print(format_report(report, evaluation_config.get('max_accuracy_loss', 0.01)))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Detailed report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
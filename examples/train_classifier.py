@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import argparse
+
+# Add the parent directory to the path so we can import our package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from insurance_triage.tools.email_classifier import EmailClassifier
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local email classifier from labeled triage history.")
+    parser.add_argument("history", help="JSONL file with one {content, email_type, urgency} record per line")
+    parser.add_argument("--output", default="config/models/email_classifier.npz", help="Where to save the model")
+    parser.add_argument("--epochs", type=int, default=200)
+    args = parser.parse_args()
+
+    # Load labeled history
+    emails, email_types, urgencies = [], [], []
+    with open(args.history, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            emails.append(record["content"])
+            email_types.append(record["email_type"])
+            urgencies.append(record["urgency"])
+
+    print(f"Training on {len(emails)} labeled emails...")
+    classifier = EmailClassifier().fit(emails, email_types, urgencies, epochs=args.epochs)
+
+    # Report training-set agreement as a quick sanity check
+    predictions = classifier.predict_batch(emails)
+    type_accuracy = sum(p["email_type"] == t for p, t in zip(predictions, email_types)) / len(emails)
+    urgency_accuracy = sum(p["urgency"] == u for p, u in zip(predictions, urgencies)) / len(emails)
+    print(f"Email type accuracy: {type_accuracy:.3f}")
+    print(f"Urgency accuracy: {urgency_accuracy:.3f}")
+    print(f"Calibration temperatures: {classifier.temperatures}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    classifier.save(args.output)
+    print(f"\nModel saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,13 @@ A system for automatically categorizing, analyzing, and routing insurance-relate
 using AI agents via the CrewAI framework.
 """
 
-from insurance_triage.triage_crew import InsuranceEmailTriageCrew
+__version__ = '0.1.0'
 
-__version__ = '0.1.0'
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported on first use so the queue, rules and logging utilities work
+    # without the crew dependencies installed
+    if name == "InsuranceEmailTriageCrew":
+        from insurance_triage.triage_crew import InsuranceEmailTriageCrew
+        return InsuranceEmailTriageCrew
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,10 @@
+import logging
 from crewai import Agent
 from langchain.tools import Tool
 from typing import Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
 class AgentFactory:
     """Factory class for creating CrewAI Agents from configuration."""
     
@@ -31,7 +34,7 @@ class AgentFactory:
                 if tool_name in self.tools_dict:
                     agent_tools.append(self.tools_dict[tool_name])
                 else:
-                    print(f"Warning: Tool '{tool_name}' not found in available tools.")
+                    logger.warning("Tool '%s' not found in available tools.", tool_name)
         
         # Create the agent
         agent = Agent(
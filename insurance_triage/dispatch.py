@@ -0,0 +1,304 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Any, Tuple
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+# Results that failed formatting have no routing; they are parked for review
+UNROUTED_TEAM = "Unrouted"
+
+GroupKey = Tuple[str, bool]
+Groups = Dict[GroupKey, List[Tuple[str, Dict[str, Any]]]]
+
+
+def dispatch_key(result: Dict[str, Any]) -> str:
+    """
+    Idempotency key for a triage result.
+
+    The same email always maps to the same key, so replaying a batch never
+    creates duplicate outbox entries. The key is the email_id that triage
+    records in the result's metadata (the queue item id in worker mode). A
+    crew re-triage of a shed email gets its own key so the improved result is
+    still delivered.
+    """
+    metadata = result.get("email_metadata") or {}
+    key = metadata.get("email_id")
+    if not key:
+        # Results without an id can only be told apart by their content
+        key = hashlib.sha256(json.dumps(result, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    if result.get("retriage_of"):
+        key += ":retriage"
+    return key
+
+
+def group_results(results: List[Dict[str, Any]]) -> Groups:
+    """Group results by routing team and manual-review flag, keyed for idempotency."""
+    groups = defaultdict(list)
+    for result in results:
+        routing = result.get("routing")
+        if "error" in result or not isinstance(routing, dict) or not routing.get("team"):
+            group = (UNROUTED_TEAM, True)
+        else:
+            group = (routing["team"], bool(routing.get("requires_manual_review", False)))
+        groups[group].append((dispatch_key(result), result))
+    return dict(groups)
+
+
+def _slug(team: str) -> str:
+    """Filesystem- and SQL-safe name for a team."""
+    return re.sub(r"[^a-z0-9]+", "_", team.lower()).strip("_") or "unrouted"
+
+
+class Outbox(ABC):
+    """
+    Durable per-team store for triage results awaiting delivery.
+
+    fsync_policy controls durability: 'always' makes every group write
+    durable on its own, 'batch' makes each write_groups() call durable as a
+    whole with a single sync, and 'never' leaves flushing to the OS.
+    """
+
+    def __init__(self, fsync_policy: str = "batch"):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Expected one of {FSYNC_POLICIES}")
+        self.fsync_policy = fsync_policy
+
+    @abstractmethod
+    def write_groups(self, groups: Groups) -> Dict[GroupKey, int]:
+        """Write grouped results. Returns the number of new entries per group."""
+
+    def close(self) -> None:
+        """Release any open files or connections."""
+
+
+class SQLiteOutbox(Outbox):
+    """Outbox with one SQLite table per team, written with batched transactions."""
+
+    def __init__(self, path: str, fsync_policy: str = "batch"):
+        """
+        Initialize the outbox.
+
+        Args:
+            path: Path to the SQLite database file
+            fsync_policy: One of 'always', 'batch' or 'never'
+        """
+        super().__init__(fsync_policy)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={'OFF' if fsync_policy == 'never' else 'FULL'}")
+        self._tables = set()
+
+    def _table(self, team: str) -> str:
+        """Return the outbox table for a team, creating it on first use."""
+        table = f"outbox_{_slug(team)}"
+        if table not in self._tables:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    dispatch_key TEXT PRIMARY KEY,
+                    requires_manual_review INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    delivered_at REAL
+                )
+            """)
+            self._tables.add(table)
+        return table
+
+    def _insert(self, team: str, manual_review: bool, entries: List[Tuple[str, Dict[str, Any]]]) -> int:
+        table = self._table(team)
+        before = self.conn.total_changes
+        now = time.time()
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {table} (dispatch_key, requires_manual_review, payload, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(key, int(manual_review), json.dumps(result, default=str), now) for key, result in entries]
+        )
+        return self.conn.total_changes - before
+
+    def write_groups(self, groups: Groups) -> Dict[GroupKey, int]:
+        # Create any new team tables before opening the write transaction
+        for team, _ in groups:
+            self._table(team)
+
+        written = {}
+        if self.fsync_policy == "always":
+            # One durable commit per group
+            for (team, manual_review), entries in groups.items():
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    written[(team, manual_review)] = self._insert(team, manual_review, entries)
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            return written
+
+        # One commit (and at most one sync) for the whole dispatch
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for (team, manual_review), entries in groups.items():
+                written[(team, manual_review)] = self._insert(team, manual_review, entries)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return written
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class JSONLOutbox(Outbox):
+    """
+    Outbox of append-only JSONL spool files, one per team.
+
+    Each line records its manual-review flag, mirroring the SQLite outbox's
+    per-team tables, so a dispatch key is written at most once per team
+    whatever its flag. Keys already present in a spool file are loaded on
+    first use so replays are skipped. A torn final line left by a crash is
+    ignored when loading.
+    """
+
+    def __init__(self, directory: str, fsync_policy: str = "batch"):
+        """
+        Initialize the outbox.
+
+        Args:
+            directory: Directory holding the spool files
+            fsync_policy: One of 'always', 'batch' or 'never'
+        """
+        super().__init__(fsync_policy)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._seen: Dict[str, set] = {}
+        self._torn: set = set()
+
+    def _path(self, team: str) -> str:
+        return os.path.join(self.directory, _slug(team) + ".jsonl")
+
+    def _seen_keys(self, path: str) -> set:
+        """Keys already written to a spool file."""
+        if path not in self._seen:
+            keys = set()
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    for line in f:
+                        try:
+                            keys.add(json.loads(line)["dispatch_key"])
+                        except (ValueError, KeyError):
+                            continue
+                    # A crash mid-write can leave the last line unterminated
+                    if f.tell() and not line.endswith("\n"):
+                        self._torn.add(path)
+            self._seen[path] = keys
+        return self._seen[path]
+
+    def write_groups(self, groups: Groups) -> Dict[GroupKey, int]:
+        written, to_sync = {}, {}
+        for (team, manual_review), entries in groups.items():
+            path = self._path(team)
+            seen = self._seen_keys(path)
+
+            lines, new_keys = [], set()
+            for key, result in entries:
+                if key in seen or key in new_keys:
+                    continue
+                lines.append(json.dumps({
+                    "dispatch_key": key,
+                    "requires_manual_review": manual_review,
+                    "created_at": time.time(),
+                    "result": result
+                }, default=str))
+                new_keys.add(key)
+
+            written[(team, manual_review)] = len(lines)
+            if not lines:
+                continue
+
+            # One write per group; the file is opened in append mode so
+            # concurrent writers never interleave within a line
+            data = "\n".join(lines) + "\n"
+            if path in self._torn:
+                data = "\n" + data
+                self._torn.discard(path)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data.encode("utf-8"))
+                if self.fsync_policy == "always":
+                    os.fsync(fd)
+                elif self.fsync_policy == "batch":
+                    to_sync[path] = None
+            finally:
+                os.close(fd)
+            seen.update(new_keys)
+
+        # A single sync pass once every group has been written
+        for path in to_sync:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        return written
+
+
+class DispatchStage:
+    """Fan routed triage results out to per-team durable outboxes."""
+
+    def __init__(self, outbox: Outbox):
+        """
+        Initialize the dispatch stage.
+
+        Args:
+            outbox: Outbox backend to write to
+        """
+        self.outbox = outbox
+
+    @classmethod
+    def from_config(cls, dispatch_config: Dict[str, Any], base_dir: str = None) -> "DispatchStage":
+        """
+        Build a dispatch stage from the 'dispatch' section of config.yaml.
+
+        Args:
+            dispatch_config: Dispatch configuration
+            base_dir: Directory that relative outbox paths resolve against
+        """
+        backend = dispatch_config.get("backend", "sqlite")
+        path = dispatch_config.get("path", "outbox.db" if backend == "sqlite" else "outbox")
+        if base_dir and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        fsync_policy = dispatch_config.get("fsync_policy", "batch")
+
+        if backend == "sqlite":
+            return cls(SQLiteOutbox(path, fsync_policy))
+        if backend == "jsonl":
+            return cls(JSONLOutbox(path, fsync_policy))
+        raise ValueError(f"Unknown dispatch backend '{backend}'. Expected 'sqlite' or 'jsonl'")
+
+    def dispatch(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write a batch of triage results to their team outboxes.
+
+        Returns:
+            Number of new outbox entries per team (replayed results count as zero)
+        """
+        written = self.outbox.write_groups(group_results(results))
+
+        per_team = defaultdict(int)
+        for (team, _), count in written.items():
+            per_team[team] += count
+        return dict(per_team)
+
+    def close(self) -> None:
+        self.outbox.close()
@@ -0,0 +1,374 @@
+import json
+import time
+import math
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional, Sequence
+
+from insurance_triage.tools.emails_tools import EmailTools
+from insurance_triage.tools.email_document import EmailDocument
+
+# A tier takes a labeled email record and returns at least email_type and
+# urgency, optionally with a confidence, token usage and a latency override.
+# Tiers are timed one email at a time unless they set concurrent = True,
+# which only tiers that report their own latency should do.
+Tier = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+LABELS = ("email_type", "urgency")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a labeled corpus from a JSONL file.
+
+    Each line holds one email with an id, content, and the true email_type
+    and urgency labels.
+    """
+    corpus = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                corpus.append(json.loads(line))
+    return corpus
+
+
+def rules_tier(email: Dict[str, Any]) -> Dict[str, Any]:
+    """Classify an email with the keyword rules in EmailTools."""
+    # A fresh document, so the timing includes the analysis another tier may have memoized
+    extracted = EmailTools.extract_email_data(EmailDocument(email["content"]))
+    return {"email_type": extracted["email_type"], "urgency": extracted["urgency"]}
+
+
+def classifier_tier(classifier) -> Tier:
+    """Wrap a trained EmailClassifier as an evaluation tier."""
+    def classify(email: Dict[str, Any]) -> Dict[str, Any]:
+        return classifier.predict_batch([EmailDocument(email["content"])])[0]
+    return classify
+
+
+class RecordedCrewTier:
+    """
+    Replay recorded crew responses so the crew can be evaluated offline.
+
+    Recordings are JSONL lines of {id, triage_tier, classification,
+    token_usage, latency_ms, error} as written by record_crew_responses().
+    Recorded failures, and responses that did not come from the crew, replay
+    as errors.
+    """
+
+    # Replay reports the recorded latency, so it can safely run in parallel
+    concurrent = True
+
+    def __init__(self, recordings_path: str):
+        self.recordings = {}
+        with open(recordings_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.recordings[str(record["id"])] = record
+
+    def __call__(self, email: Dict[str, Any]) -> Dict[str, Any]:
+        record = self.recordings.get(str(email["id"]))
+        if record is None:
+            raise KeyError(f"No recorded crew response for email {email['id']}")
+        if record.get("error"):
+            raise RuntimeError(f"Recorded crew run failed: {record['error']}")
+        if record.get("triage_tier") not in (None, "crew"):
+            raise RuntimeError(f"Recorded response came from the {record['triage_tier']} tier, not the crew")
+
+        classification = record.get("classification") or {}
+        return {
+            "email_type": classification.get("email_type"),
+            "urgency": classification.get("urgency"),
+            "token_usage": record.get("token_usage") or {},
+            "latency_ms": record.get("latency_ms")
+        }
+
+
+def record_crew_responses(triage_crew, corpus: Sequence[Dict[str, Any]], output_path: str) -> None:
+    """
+    Run the live crew over a corpus once and record its responses for replay.
+
+    Every email is forced through the crew, bypassing the local classifier
+    and load shedding. Failed runs are recorded with their error so replay
+    counts them.
+
+    Args:
+        triage_crew: InsuranceEmailTriageCrew to run
+        corpus: Labeled emails with id and content
+        output_path: JSONL file to write recordings to
+    """
+    with open(output_path, "w") as f:
+        for email in corpus:
+            start = time.perf_counter()
+            try:
+                result = triage_crew.process_single_email(
+                    email["content"], email.get("metadata"), force_full_triage=True
+                )
+            except Exception as e:
+                result = {"error": str(e)}
+            record = {
+                "id": email["id"],
+                "triage_tier": result.get("triage_tier"),
+                "classification": result.get("classification"),
+                "token_usage": result.get("token_usage") or {},
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "error": result.get("error")
+            }
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def _percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _distribution(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Summary statistics for latency or token distributions."""
+    return {
+        "mean": sum(values) / len(values) if values else None,
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": max(values) if values else None
+    }
+
+
+class ShadowEvaluator:
+    """Replay a labeled corpus through several triage tiers side by side."""
+
+    def __init__(self, tiers: Dict[str, Tier], reference_tier: str = None, max_workers: int = 8,
+                 prompt_token_cost: float = 0.0, completion_token_cost: float = 0.0):
+        """
+        Initialize the evaluator.
+
+        Args:
+            tiers: Mapping of tier name to tier callable
+            reference_tier: Tier that escalated emails fall back to (usually the crew)
+            max_workers: Number of emails evaluated concurrently by concurrent tiers
+            prompt_token_cost: Cost per 1,000 prompt tokens
+            completion_token_cost: Cost per 1,000 completion tokens
+        """
+        if reference_tier is not None and reference_tier not in tiers:
+            raise ValueError(f"Reference tier '{reference_tier}' is not one of the evaluated tiers")
+
+        self.tiers = tiers
+        self.reference_tier = reference_tier
+        self.max_workers = max_workers
+        self.prompt_token_cost = prompt_token_cost
+        self.completion_token_cost = completion_token_cost
+
+    def _run_tier(self, tier: Tier, email: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one tier on one email, timing it and capturing failures."""
+        start = time.perf_counter()
+        try:
+            output = tier(email)
+        except Exception as e:
+            return {"error": str(e), "latency_ms": (time.perf_counter() - start) * 1000}
+
+        output = dict(output)
+        # Replayed tiers report the latency that was recorded live
+        if output.get("latency_ms") is None:
+            output["latency_ms"] = (time.perf_counter() - start) * 1000
+        return output
+
+    def _run_tier_on_corpus(self, tier: Tier, corpus: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run one tier over the corpus, sequentially unless it reports its own latency."""
+        if getattr(tier, "concurrent", False):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(lambda email: self._run_tier(tier, email), corpus))
+        # Timed alone, so thread contention does not inflate local latencies
+        return [self._run_tier(tier, email) for email in corpus]
+
+    def _cost(self, token_usage: Dict[str, Any]) -> float:
+        return (
+            token_usage.get("prompt_tokens", 0) * self.prompt_token_cost
+            + token_usage.get("completion_tokens", 0) * self.completion_token_cost
+        ) / 1000
+
+    def run(self, corpus: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Evaluate every tier on the corpus.
+
+        Returns:
+            Report with per-tier accuracy, per-class metrics, confusion matrices,
+            latency, token and cost distributions, plus escalation threshold
+            recommendations for tiers that emit a confidence
+        """
+        tier_outputs = {name: self._run_tier_on_corpus(tier, corpus) for name, tier in self.tiers.items()}
+        outputs = [{name: tier_outputs[name][i] for name in self.tiers} for i in range(len(corpus))]
+
+        report = {"emails": len(corpus), "tiers": {}, "thresholds": {}}
+        for name in self.tiers:
+            report["tiers"][name] = self._tier_report(name, corpus, outputs)
+
+        if self.reference_tier is not None:
+            for name in self.tiers:
+                if name != self.reference_tier and any("confidence" in o[name] for o in outputs):
+                    report["thresholds"][name] = self._threshold_sweep(name, corpus, outputs)
+
+        return report
+
+    def _tier_report(self, name: str, corpus: Sequence[Dict[str, Any]],
+                     outputs: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Compute accuracy, per-class metrics and distributions for one tier."""
+        tier_outputs = [o[name] for o in outputs]
+        errors = sum(1 for o in tier_outputs if "error" in o)
+        tier_report = {"errors": errors}
+
+        for label in LABELS:
+            confusion = defaultdict(lambda: defaultdict(int))
+            reference_agreement = defaultdict(lambda: [0, 0])
+            correct = 0
+            for email, output, all_outputs in zip(corpus, tier_outputs, outputs):
+                truth, predicted = email[label], output.get(label)
+                confusion[truth][predicted] += 1
+                correct += truth == predicted
+                if self.reference_tier is not None:
+                    reference = all_outputs[self.reference_tier].get(label)
+                    reference_agreement[truth][0] += predicted == reference
+                    reference_agreement[truth][1] += 1
+
+            per_class = {}
+            classes = sorted(set(confusion) | {p for row in confusion.values() for p in row if p is not None})
+            for cls in classes:
+                support = sum(confusion[cls].values())
+                predicted_count = sum(row.get(cls, 0) for row in confusion.values())
+                true_positive = confusion[cls].get(cls, 0)
+                metrics = {
+                    "support": support,
+                    "precision": true_positive / predicted_count if predicted_count else None,
+                    "recall": true_positive / support if support else None
+                }
+                if cls in reference_agreement:
+                    agreed, total = reference_agreement[cls]
+                    metrics["agreement_with_reference"] = agreed / total
+                per_class[cls] = metrics
+
+            tier_report[label] = {
+                "accuracy": correct / len(corpus) if corpus else None,
+                "per_class": per_class,
+                "confusion_matrix": {truth: dict(row) for truth, row in confusion.items()}
+            }
+
+        tier_report["latency_ms"] = _distribution([o["latency_ms"] for o in tier_outputs])
+
+        usages = [o.get("token_usage") or {} for o in tier_outputs]
+        tokens = [u.get("total_tokens", u.get("prompt_tokens", 0) + u.get("completion_tokens", 0)) for u in usages]
+        costs = [self._cost(u) for u in usages]
+        tier_report["tokens"] = _distribution(tokens)
+        tier_report["tokens"]["total"] = sum(tokens)
+        tier_report["cost"] = _distribution(costs)
+        tier_report["cost"]["total"] = sum(costs)
+        return tier_report
+
+    def _threshold_sweep(self, name: str, corpus: Sequence[Dict[str, Any]],
+                         outputs: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Simulate escalating low-confidence emails from a tier to the reference tier.
+
+        An email counts as correct when both its type and urgency match the
+        labels. For each threshold the emails at or above it are settled by
+        the tier and the rest use the reference tier's answer and cost.
+        """
+        def correct(output, email):
+            return all(output.get(label) == email[label] for label in LABELS)
+
+        reference_correct, reference_costs = [], []
+        for email, all_outputs in zip(corpus, outputs):
+            reference = all_outputs[self.reference_tier]
+            reference_correct.append(correct(reference, email))
+            reference_costs.append(self._cost(reference.get("token_usage") or {}))
+        reference_accuracy = sum(reference_correct) / len(corpus) if corpus else 0.0
+
+        sweep = []
+        for step in range(50, 100):
+            threshold = step / 100
+            settled, settled_correct, combined_correct, cost = 0, 0, 0, 0.0
+            for i, (email, all_outputs) in enumerate(zip(corpus, outputs)):
+                output = all_outputs[name]
+                if output.get("confidence", 0.0) >= threshold and "error" not in output:
+                    settled += 1
+                    is_correct = correct(output, email)
+                    settled_correct += is_correct
+                    combined_correct += is_correct
+                else:
+                    combined_correct += reference_correct[i]
+                    cost += reference_costs[i]
+            sweep.append({
+                "threshold": threshold,
+                "coverage": settled / len(corpus) if corpus else 0.0,
+                "settled_accuracy": settled_correct / settled if settled else None,
+                "combined_accuracy": combined_correct / len(corpus) if corpus else 0.0,
+                "cost": cost
+            })
+
+        return {
+            "reference_accuracy": reference_accuracy,
+            "reference_cost": sum(reference_costs),
+            "sweep": sweep
+        }
+
+    @staticmethod
+    def recommend_threshold(threshold_report: Dict[str, Any], max_accuracy_loss: float = 0.01) -> Optional[Dict[str, Any]]:
+        """
+        Pick the lowest escalation threshold that stays within an accuracy budget.
+
+        Args:
+            threshold_report: One entry of report["thresholds"]
+            max_accuracy_loss: Allowed drop in combined accuracy versus
+                               sending every email to the reference tier
+
+        Returns:
+            The chosen sweep row, or None if no threshold meets the budget
+        """
+        target = threshold_report["reference_accuracy"] - max_accuracy_loss
+        for row in threshold_report["sweep"]:
+            if row["combined_accuracy"] >= target:
+                return row
+        return None
+
+
+def format_report(report: Dict[str, Any], max_accuracy_loss: float = 0.01) -> str:
+    """Render an evaluation report as readable text."""
+    def fmt(value, spec=".3f"):
+        return "-" if value is None else format(value, spec)
+
+    lines = [f"Evaluated {report['emails']} emails", ""]
+    for name, tier in report["tiers"].items():
+        lines.append(f"== {name} ==")
+        lines.append(f"Errors: {tier['errors']}")
+        for label in LABELS:
+            lines.append(f"{label} accuracy: {fmt(tier[label]['accuracy'])}")
+            for cls, metrics in tier[label]["per_class"].items():
+                agreement = metrics.get("agreement_with_reference")
+                lines.append(
+                    f"  {str(cls):<16} support {metrics['support']:>5}  precision {fmt(metrics['precision'])}  "
+                    f"recall {fmt(metrics['recall'])}  reference agreement {fmt(agreement)}"
+                )
+        latency = tier["latency_ms"]
+        lines.append(f"Latency ms: p50 {fmt(latency['p50'])}  p90 {fmt(latency['p90'])}  p99 {fmt(latency['p99'])}")
+        lines.append(f"Tokens: total {tier['tokens']['total']}  p50 {fmt(tier['tokens']['p50'], '.0f')}")
+        lines.append(f"Cost: total {fmt(tier['cost']['total'], '.4f')}")
+        lines.append("")
+
+    for name, thresholds in report["thresholds"].items():
+        recommended = ShadowEvaluator.recommend_threshold(thresholds, max_accuracy_loss)
+        lines.append(f"== escalation from {name} ==")
+        if recommended is None:
+            lines.append(f"No threshold keeps accuracy within {max_accuracy_loss:.3f} of the reference tier")
+        else:
+            lines.append(
+                f"Recommended threshold {recommended['threshold']:.2f}: settles {recommended['coverage']:.1%} locally, "
+                f"combined accuracy {recommended['combined_accuracy']:.3f} "
+                f"(reference {thresholds['reference_accuracy']:.3f}), "
+                f"cost {recommended['cost']:.4f} vs {thresholds['reference_cost']:.4f}"
+            )
+        lines.append("")
+
+    return "\n".join(lines)
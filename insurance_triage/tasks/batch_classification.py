@@ -0,0 +1,167 @@
+import re
+import json
+import logging
+from crewai import Crew, Process, Task
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+BATCH_INSTRUCTIONS = """
+You are given {count} separate emails, each marked with an index. Classify every
+email independently, exactly as you would if it were the only email.
+
+Respond with ONLY a JSON array containing one object per email. Each object must
+include an integer "index" field matching the email's index, plus the same fields
+you would return for a single email. Do not merge, skip or reorder emails.
+"""
+
+
+def _output_text(output: Any) -> str:
+    """Normalize a CrewAI task output to plain text."""
+    if isinstance(output, str):
+        return output
+    raw = getattr(output, "raw", None)
+    if isinstance(raw, str):
+        return raw
+    return str(output)
+
+
+def parse_batch_output(output: str, count: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Split an indexed batch response back into per-email results.
+
+    Entries that are not objects, lack a valid index, repeat an index or are
+    missing an email_type are dropped so that the caller can fall back to
+    classifying those emails one at a time.
+
+    Args:
+        output: Raw model output expected to contain a JSON array
+        count: Number of emails in the batch
+
+    Returns:
+        Dictionary mapping email index to its parsed classification
+    """
+    match = _JSON_ARRAY.search(output or "")
+    if match is None:
+        return {}
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    parsed, duplicates = {}, set()
+    for item in items:
+        if not isinstance(item, dict) or "email_type" not in item:
+            continue
+        index = item.get("index")
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < count:
+            continue
+        if index in parsed:
+            duplicates.add(index)
+            continue
+        parsed[index] = {key: value for key, value in item.items() if key != "index"}
+
+    # An index answered twice is ambiguous, so neither answer is trusted
+    for index in duplicates:
+        parsed.pop(index, None)
+    return parsed
+
+
+class ClassificationBatcher:
+    """
+    Classify several emails per model call.
+
+    The role, backstory and instructions of the classification task are sent
+    once for a whole batch of indexed emails instead of once per email. The
+    structured answer is split back out by index; any email whose answer is
+    missing or malformed is re-classified with its own single-email call. An
+    email that cannot be classified at all gets None, and the crew then runs
+    the classification task for it as usual.
+    """
+
+    def __init__(self, agent, task_config: Dict[str, Any], max_items: int = 8, verbose: bool = False):
+        """
+        Initialize the batcher.
+
+        Args:
+            agent: The classification agent
+            task_config: Configuration of the classification task
+            max_items: Maximum number of emails packed into one call
+            verbose: Whether the batch crews print verbose transcripts
+        """
+        self.agent = agent
+        self.task_config = task_config
+        self.max_items = max(1, max_items)
+        self.verbose = verbose
+
+    def _run_task(self, description: str, expected_output: str) -> str:
+        """Run one task with the classification agent and return its text output."""
+        task = Task(description=description, agent=self.agent, expected_output=expected_output)
+        crew = Crew(agents=[self.agent], tasks=[task], verbose=self.verbose, process=Process.sequential)
+        crew.kickoff()
+        return _output_text(task.output)
+
+    def classify_one(self, email_content: str) -> str:
+        """Classify a single email with its own model call."""
+        description = self.task_config.get("description", "") + f"\n\nEmail Content:\n{email_content}"
+        return self._run_task(description, self.task_config.get("expected_output", ""))
+
+    def _classify_fallback(self, email_content: str) -> Optional[str]:
+        """Classify one email on its own, or return None if that call fails too."""
+        try:
+            return self.classify_one(email_content)
+        except Exception:
+            logger.exception("Single-email classification failed; leaving it to the crew")
+            return None
+
+    def _classify_batch(self, email_contents: List[str]) -> List[Optional[str]]:
+        """Classify up to max_items emails in one call, falling back per item."""
+        if len(email_contents) == 1:
+            return [self._classify_fallback(email_contents[0])]
+
+        description = self.task_config.get("description", "") + BATCH_INSTRUCTIONS.format(count=len(email_contents))
+        for index, email_content in enumerate(email_contents):
+            description += f"\n\n=== Email index {index} ===\n{email_content}"
+        expected_output = (
+            f"A JSON array of {len(email_contents)} objects, each with an 'index' field and: "
+            + self.task_config.get("expected_output", "")
+        )
+
+        try:
+            parsed = parse_batch_output(self._run_task(description, expected_output), len(email_contents))
+        except Exception:
+            logger.exception("Batched classification call failed; classifying emails individually")
+            parsed = {}
+
+        results = []
+        for index, email_content in enumerate(email_contents):
+            if index in parsed:
+                results.append(json.dumps(parsed[index]))
+            else:
+                results.append(self._classify_fallback(email_content))
+
+        fallbacks = len(email_contents) - len(parsed)
+        if fallbacks:
+            logger.warning("Batched classification fell back to single calls", extra={"fields": {
+                "event": "batch_classification_fallback",
+                "batch_size": len(email_contents),
+                "fallbacks": fallbacks
+            }})
+        return results
+
+    def classify_many(self, email_contents: List[str]) -> List[Optional[str]]:
+        """
+        Classify a list of emails in chunks of max_items.
+
+        Returns:
+            One classification output (a JSON string) per email, in input
+            order; None for an email that could not be classified
+        """
+        results = []
+        for start in range(0, len(email_contents), self.max_items):
+            results.extend(self._classify_batch(email_contents[start:start + self.max_items]))
+        return results
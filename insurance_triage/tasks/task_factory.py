@@ -1,6 +1,9 @@
+import logging
 from crewai import Task
 from typing import Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
 class TaskFactory:
     """Factory class for creating CrewAI Tasks from configuration."""
     
@@ -14,7 +17,8 @@ class TaskFactory:
         self.agents_dict = agents_dict or {}
         self.tasks_dict = {}  # Will store created tasks for context references
     
-    def create_task(self, task_name: str, task_config: Dict[str, Any], email_content: str = None) -> Task:
+    def create_task(self, task_name: str, task_config: Dict[str, Any], email_content: str = None,
+                    precomputed_outputs: Dict[str, str] = None) -> Task:
         """
         Create a CrewAI Task from a configuration dictionary.
         
@@ -22,6 +26,8 @@ class TaskFactory:
             task_name: Name of the task
             task_config: Dictionary containing task configuration
             email_content: Optional email content to include in task description
+            precomputed_outputs: Optional outputs of context tasks that were run
+                                 elsewhere; these are inlined into the description
             
         Returns:
             CrewAI Task object
@@ -42,10 +48,12 @@ class TaskFactory:
         context = []
         if "context" in task_config and task_config["context"]:
             for context_task_name in task_config["context"]:
-                if context_task_name in self.tasks_dict:
+                if precomputed_outputs and context_task_name in precomputed_outputs:
+                    description += f"\n\nOutput of {context_task_name}:\n{precomputed_outputs[context_task_name]}"
+                elif context_task_name in self.tasks_dict:
                     context.append(self.tasks_dict[context_task_name])
                 else:
-                    print(f"Warning: Context task '{context_task_name}' not found for task '{task_name}'")
+                    logger.warning("Context task '%s' not found for task '%s'", context_task_name, task_name)
         
         # Create the task
         task = Task(
@@ -60,20 +68,29 @@ class TaskFactory:
         
         return task
     
-    def create_tasks_from_config(self, tasks_config: Dict[str, Dict[str, Any]], email_content: str = None) -> List[Task]:
+    def clear(self) -> None:
+        """Drop references to previously created tasks and their email content."""
+        self.tasks_dict.clear()
+    
+    def create_tasks_from_config(self, tasks_config: Dict[str, Dict[str, Any]], email_content: str = None,
+                                 precomputed_outputs: Dict[str, str] = None) -> List[Task]:
         """
         Create multiple tasks from a configuration dictionary.
         
         Args:
             tasks_config: Dictionary mapping task names to their configurations
             email_content: Optional email content to include in task descriptions
+            precomputed_outputs: Optional outputs for tasks that were already run
+                                 (e.g. by batched classification); those tasks are skipped
             
         Returns:
             List of task objects in the order they were defined
         """
         tasks = []
         for task_name, config in tasks_config.items():
-            task = self.create_task(task_name, config, email_content)
+            if precomputed_outputs and task_name in precomputed_outputs:
+                continue
+            task = self.create_task(task_name, config, email_content, precomputed_outputs)
             tasks.append(task)
         
         return tasks
\ No newline at end of file
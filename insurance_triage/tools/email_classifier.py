@@ -0,0 +1,288 @@
+import zlib
+from collections import Counter
+from typing import Dict, List, Any, Sequence, Tuple, Union
+
+import numpy as np
+
+from insurance_triage.tools.email_document import EmailDocument
+
+Email = Union[str, EmailDocument]
+
+
+class EmailClassifier:
+    """Lightweight linear classifier for email type and urgency.
+
+    Emails are turned into hashed word n-gram features and scored by one
+    softmax-regression head per label. All inference is done in NumPy over
+    whole batches, so it sits cheaply between the keyword rules in
+    EmailTools and the LLM crew.
+    """
+
+    HEADS = ("email_type", "urgency")
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2)):
+        """
+        Initialize an untrained classifier.
+
+        Args:
+            n_features: Size of the hashed feature space
+            ngram_range: Minimum and maximum word n-gram length
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.classes: Dict[str, np.ndarray] = {}
+        self.weights: Dict[str, np.ndarray] = {}
+        self.biases: Dict[str, np.ndarray] = {}
+        self.temperatures: Dict[str, float] = {head: 1.0 for head in self.HEADS}
+
+    # Feature extraction
+    def _hash_features(self, email: Email) -> Counter:
+        """Count hashed n-gram features for a single email."""
+        tokens = EmailDocument.coerce(email).words
+        counts = Counter()
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = " ".join(tokens[i:i + n])
+                counts[zlib.crc32(gram.encode("utf-8")) % self.n_features] += 1
+        return counts
+
+    def _vectorize(self, emails: Sequence[Email]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build a sparse (row, column, value) feature matrix for a batch.
+
+        Counts are log-scaled and each row is L2-normalized so that long
+        emails do not dominate the scores.
+        """
+        rows, cols, vals = [], [], []
+        for row, email in enumerate(emails):
+            counts = self._hash_features(email)
+            if not counts:
+                continue
+            values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+            values /= np.linalg.norm(values)
+            rows.append(np.full(len(counts), row, dtype=np.int64))
+            cols.append(np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)))
+            vals.append(values)
+
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+    @staticmethod
+    def _scores(features: Tuple[np.ndarray, np.ndarray, np.ndarray], n_rows: int,
+                weights: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        """Compute raw class scores (X @ W + b) for a sparse batch."""
+        rows, cols, vals = features
+        scores = np.tile(bias, (n_rows, 1))
+        np.add.at(scores, rows, weights[cols] * vals[:, None])
+        return scores
+
+    @staticmethod
+    def _softmax(scores: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+        """Row-wise softmax with optional temperature scaling."""
+        scaled = scores / temperature
+        scaled -= scaled.max(axis=1, keepdims=True)
+        exp = np.exp(scaled)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    # Training
+    def fit(self, emails: Sequence[Email], email_types: Sequence[str], urgencies: Sequence[str],
+            epochs: int = 200, learning_rate: float = 1.0, l2: float = 1e-4,
+            validation_split: float = 0.2, seed: int = 0) -> "EmailClassifier":
+        """
+        Train both heads from labeled triage history.
+
+        A held-out fraction of the data is used to fit a softmax temperature
+        per head so that the returned probabilities are calibrated.
+
+        Args:
+            emails: Raw email texts or EmailDocuments
+            email_types: Email type label for each email
+            urgencies: Urgency label for each email
+            epochs: Number of full-batch gradient descent steps
+            learning_rate: Gradient descent step size
+            l2: L2 regularization strength
+            validation_split: Fraction of emails held out for calibration
+            seed: Seed for the train/calibration shuffle
+
+        Returns:
+            The fitted classifier
+        """
+        if not (len(emails) == len(email_types) == len(urgencies)):
+            raise ValueError("emails, email_types and urgencies must have the same length")
+        if not emails:
+            raise ValueError("Cannot fit classifier on an empty dataset")
+
+        order = np.random.default_rng(seed).permutation(len(emails))
+        n_holdout = int(len(emails) * validation_split) if len(emails) > 1 else 0
+        holdout, train = order[:n_holdout], order[n_holdout:]
+
+        labels = {"email_type": np.asarray(email_types), "urgency": np.asarray(urgencies)}
+        train_emails = [emails[i] for i in train]
+        train_features = self._vectorize(train_emails)
+        holdout_emails = [emails[i] for i in holdout]
+        holdout_features = self._vectorize(holdout_emails)
+
+        for head in self.HEADS:
+            classes, encoded = np.unique(labels[head], return_inverse=True)
+            self.classes[head] = classes
+            weights, bias = self._train_head(
+                train_features, encoded[train], len(classes), epochs, learning_rate, l2
+            )
+            self.weights[head] = weights
+            self.biases[head] = bias
+
+            if n_holdout:
+                holdout_scores = self._scores(holdout_features, n_holdout, weights, bias)
+                self.temperatures[head] = self._fit_temperature(holdout_scores, encoded[holdout])
+
+        return self
+
+    def _train_head(self, features: Tuple[np.ndarray, np.ndarray, np.ndarray], targets: np.ndarray,
+                    n_classes: int, epochs: int, learning_rate: float, l2: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Fit one softmax-regression head with full-batch gradient descent."""
+        rows, cols, vals = features
+        n_rows = len(targets)
+        weights = np.zeros((self.n_features, n_classes), dtype=np.float32)
+        bias = np.zeros(n_classes, dtype=np.float32)
+        one_hot = np.eye(n_classes, dtype=np.float32)[targets]
+
+        # Only hashed columns that actually occur need regularization updates
+        active = np.unique(cols)
+
+        for _ in range(epochs):
+            probs = self._softmax(self._scores(features, n_rows, weights, bias))
+            error = (probs - one_hot) / n_rows
+
+            grad = np.zeros_like(weights)
+            np.add.at(grad, cols, error[rows] * vals[:, None])
+            grad[active] += l2 * weights[active]
+
+            weights -= learning_rate * grad
+            bias -= learning_rate * error.sum(axis=0)
+
+        return weights, bias
+
+    def _fit_temperature(self, scores: np.ndarray, targets: np.ndarray) -> float:
+        """Pick the softmax temperature minimizing held-out negative log-likelihood."""
+        best_temperature, best_nll = 1.0, np.inf
+        for temperature in np.geomspace(0.05, 10.0, 60):
+            probs = self._softmax(scores, temperature)
+            nll = -np.mean(np.log(probs[np.arange(len(targets)), targets] + 1e-12))
+            if nll < best_nll:
+                best_temperature, best_nll = float(temperature), nll
+        return best_temperature
+
+    # Inference
+    def predict_proba(self, emails: Sequence[Email]) -> Dict[str, np.ndarray]:
+        """
+        Compute calibrated class probabilities for a batch of emails.
+
+        Args:
+            emails: Raw email texts or EmailDocuments
+
+        Returns:
+            Dictionary mapping each head to an (n_emails, n_classes) array
+        """
+        if not self.weights:
+            raise RuntimeError("EmailClassifier has not been trained or loaded")
+
+        features = self._vectorize(emails)
+        return {
+            head: self._softmax(
+                self._scores(features, len(emails), self.weights[head], self.biases[head]),
+                self.temperatures[head]
+            )
+            for head in self.HEADS
+        }
+
+    def predict_batch(self, emails: Sequence[Email]) -> List[Dict[str, Any]]:
+        """
+        Classify a batch of emails.
+
+        Args:
+            emails: Raw email texts or EmailDocuments
+
+        Returns:
+            One dictionary per email with the predicted email_type and urgency,
+            an overall confidence (the lower of the two head maxima) and the
+            full per-class probabilities
+        """
+        if not emails:
+            return []
+
+        probabilities = self.predict_proba(emails)
+        best = {head: probabilities[head].argmax(axis=1) for head in self.HEADS}
+        confidence = np.minimum(
+            probabilities["email_type"].max(axis=1),
+            probabilities["urgency"].max(axis=1)
+        )
+
+        predictions = []
+        for i in range(len(emails)):
+            predictions.append({
+                "email_type": str(self.classes["email_type"][best["email_type"][i]]),
+                "urgency": str(self.classes["urgency"][best["urgency"][i]]),
+                "confidence": float(confidence[i]),
+                "probabilities": {
+                    head: {
+                        str(label): float(p)
+                        for label, p in zip(self.classes[head], probabilities[head][i])
+                    }
+                    for head in self.HEADS
+                }
+            })
+
+        return predictions
+
+    # Persistence
+    def save(self, path: str) -> None:
+        """
+        Save the trained model to a compressed NumPy archive.
+
+        Args:
+            path: Destination file path (conventionally ending in .npz)
+        """
+        arrays = {
+            "n_features": np.asarray(self.n_features),
+            "ngram_range": np.asarray(self.ngram_range),
+        }
+        for head in self.HEADS:
+            arrays[f"{head}_classes"] = self.classes[head].astype(str)
+            arrays[f"{head}_weights"] = self.weights[head]
+            arrays[f"{head}_bias"] = self.biases[head]
+            arrays[f"{head}_temperature"] = np.asarray(self.temperatures[head])
+
+        with open(path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "EmailClassifier":
+        """
+        Load a model previously written by save().
+
+        Args:
+            path: Path to the saved model
+
+        Returns:
+            Trained EmailClassifier
+        """
+        try:
+            with np.load(path) as data:
+                classifier = cls(
+                    n_features=int(data["n_features"]),
+                    ngram_range=tuple(int(n) for n in data["ngram_range"])
+                )
+                for head in cls.HEADS:
+                    classifier.classes[head] = data[f"{head}_classes"]
+                    classifier.weights[head] = data[f"{head}_weights"]
+                    classifier.biases[head] = data[f"{head}_bias"]
+                    classifier.temperatures[head] = float(data[f"{head}_temperature"])
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Classifier model not found: {path}")
+        except KeyError as e:
+            raise ValueError(f"Invalid classifier model file {path}: missing {e}")
+
+        return classifier
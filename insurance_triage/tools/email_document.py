@@ -0,0 +1,117 @@
+import re
+from functools import cached_property, lru_cache
+from typing import Dict, List, Any, Optional, Pattern, Sequence, Tuple, Union
+
+from insurance_triage.utils.rules import CompiledRules, get_rules
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+class EmailDocument:
+    """
+    Analysis of a single email, computed lazily and at most once.
+
+    Every EmailTools function accepts an EmailDocument in place of the raw
+    text. The normalized text, tokens, keyword hits, regex matches and the
+    extracted data are memoized on the document, so an email passed through
+    several tools (or several agents) is analyzed only once.
+
+    A document also pins the triage rules that were active when it was
+    created, so a rules reload never changes the analysis of an email midway.
+    """
+
+    PREVIEW_LENGTH = 150
+
+    def __init__(self, text: str, rules: CompiledRules = None):
+        """
+        Initialize the document.
+
+        Args:
+            text: Raw email content
+            rules: Triage rules to analyze with; defaults to the active rules
+        """
+        self.text = text
+        self.rules = rules if rules is not None else get_rules()
+        self.extracted_data: Optional[Dict[str, Any]] = None
+        self._keyword_hits: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._matches: Dict[Pattern, bool] = {}
+        self._searches: Dict[Pattern, Optional[re.Match]] = {}
+
+    @staticmethod
+    def for_text(text: str) -> "EmailDocument":
+        """
+        Return the shared document for a piece of email text.
+
+        Tools invoked by different agents receive the email as a plain
+        string; this bounded cache maps repeated calls back to one document.
+        Documents are cached per rules version, so text seen again after a
+        reload is re-analyzed with the new rules.
+        """
+        return EmailDocument._cached(text, get_rules())
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _cached(text: str, rules: CompiledRules) -> "EmailDocument":
+        return EmailDocument(text, rules)
+
+    @staticmethod
+    def coerce(email: Union[str, "EmailDocument"]) -> "EmailDocument":
+        """Accept either raw text or an existing document."""
+        if isinstance(email, EmailDocument):
+            return email
+        return EmailDocument.for_text(email)
+
+    @cached_property
+    def lower(self) -> str:
+        """Lowercased email text used for keyword matching."""
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[Tuple[str, int, int]]:
+        """Word tokens of the lowercased text with their start and end offsets."""
+        return [(match.group(), match.start(), match.end()) for match in _TOKEN_PATTERN.finditer(self.lower)]
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Word tokens of the lowercased text."""
+        return [token for token, _, _ in self.tokens]
+
+    @cached_property
+    def preview(self) -> str:
+        """Single-line preview of the start of the email."""
+        preview = self.text[:self.PREVIEW_LENGTH].replace("\n", " ").strip()
+        if len(self.text) > self.PREVIEW_LENGTH:
+            preview += "..."
+        return preview
+
+    def keyword_hits(self, keywords: Sequence[str]) -> Tuple[str, ...]:
+        """
+        Return the keywords that occur (as substrings) in the lowercased text.
+
+        Args:
+            keywords: Lowercase keywords to look for; pass a tuple so the
+                      result can be memoized
+        """
+        key = tuple(keywords)
+        hits = self._keyword_hits.get(key)
+        if hits is None:
+            text = self.lower
+            hits = tuple(keyword for keyword in key if keyword in text)
+            self._keyword_hits[key] = hits
+        return hits
+
+    def contains_any(self, keywords: Sequence[str]) -> bool:
+        """Whether any of the keywords occur in the lowercased text."""
+        return bool(self.keyword_hits(keywords))
+
+    def matches(self, matcher: Pattern) -> bool:
+        """Memoized check of a compiled keyword matcher against the lowercased text."""
+        if matcher not in self._matches:
+            self._matches[matcher] = matcher.search(self.lower) is not None
+        return self._matches[matcher]
+
+    def search(self, pattern: Pattern) -> Optional[re.Match]:
+        """Memoized pattern.search() over the original text."""
+        if pattern not in self._searches:
+            self._searches[pattern] = pattern.search(self.text)
+        return self._searches[pattern]
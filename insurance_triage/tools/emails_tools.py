@@ -1,31 +1,60 @@
 import re
 import json
 import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, Union
+
+from insurance_triage.tools.email_document import EmailDocument
+from insurance_triage.utils.rules import CompiledRules, get_rules
 
 class EmailTools:
     """Tools for processing insurance-related emails."""
     
+    # Keyword tables, routing and templates live in config/rules.yaml and are
+    # read from the rules each EmailDocument was created with.
+    
+    POLICY_PATTERN = re.compile(r"Policy(?:\s+Number)?(?:\s*:)?\s*([A-Z0-9-]+)", re.IGNORECASE)
+    CLAIM_PATTERN = re.compile(r"Claim(?:\s+Number|ID)?(?:\s*:)?\s*([A-Z0-9-]+)", re.IGNORECASE)
+    DATE_PATTERN = re.compile(r"(?:Due|Renewal|Effective)(?:\s+Date)?(?:\s*:)?\s*(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})", re.IGNORECASE)
+    INSURED_PATTERN = re.compile(r"(?:Insured|Client|Customer)(?:\s+Name)?(?:\s*:)?\s*([A-Za-z0-9\s,\.]+?)(?:\n|,|;)", re.IGNORECASE)
+    
     @staticmethod
-    def extract_email_data(email_content: str) -> Dict[str, Any]:
+    def extract_email_data(email_content: Union[str, EmailDocument]) -> Dict[str, Any]:
         """Extract key data points from email content."""
-        structured_data = EmailTools._extract_policy_info(email_content)
-        email_type = EmailTools._detect_email_type(email_content)
-        urgency = EmailTools._detect_urgency(email_content)
-        sentiment = EmailTools._analyze_sentiment(email_content)
-        compliance_issues = EmailTools._detect_compliance_issues(email_content)
-        
-        return {
-            "structured_data": structured_data,
-            "email_type": email_type,
-            "urgency": urgency,
-            "sentiment": sentiment,
-            "compliance_issues": compliance_issues
-        }
+        document = EmailDocument.coerce(email_content)
+        
+        # Extraction runs once per document; later calls reuse the result
+        if document.extracted_data is None:
+            document.extracted_data = {
+                "structured_data": EmailTools._extract_policy_info(document),
+                "email_type": EmailTools._detect_email_type(document),
+                "urgency": EmailTools._detect_urgency(document),
+                "sentiment": EmailTools._analyze_sentiment(document),
+                "compliance_issues": EmailTools._detect_compliance_issues(document)
+            }
+        
+        # Copy the nested values too: the memo is shared through the document
+        # cache, so callers must not be able to mutate it
+        extracted_data = dict(document.extracted_data)
+        extracted_data["structured_data"] = dict(extracted_data["structured_data"])
+        extracted_data["compliance_issues"] = list(extracted_data["compliance_issues"])
+        return extracted_data
+    
+    @staticmethod
+    def _resolve_extracted_data(extracted_data: Union[Dict, str, EmailDocument],
+                                rules: CompiledRules = None) -> Tuple[Dict, CompiledRules]:
+        """Accept either extracted data or an email to extract it from, plus the rules to apply."""
+        if isinstance(extracted_data, dict):
+            return extracted_data, rules or get_rules()
+        document = EmailDocument.coerce(extracted_data)
+        return EmailTools.extract_email_data(document), rules or document.rules
     
     @staticmethod
-    def generate_email_summary(email_content: str, extracted_data: Dict) -> str:
+    def generate_email_summary(email_content: Union[str, EmailDocument], extracted_data: Dict = None) -> str:
         """Create a concise summary of the email."""
+        document = EmailDocument.coerce(email_content)
+        if extracted_data is None:
+            extracted_data = EmailTools.extract_email_data(document)
+        
         email_type = extracted_data["email_type"]
         urgency = extracted_data["urgency"]
         structured_data = extracted_data["structured_data"]
@@ -49,17 +78,14 @@ class EmailTools:
             summary += f". Compliance flags: {', '.join(compliance_issues)}"
         
         # Add first 150 characters of the email for context
-        short_preview = email_content[:150].replace("\n", " ").strip()
-        if len(email_content) > 150:
-            short_preview += "..."
-        
-        summary += f"\n\nPreview: {short_preview}"
+        summary += f"\n\nPreview: {document.preview}"
         
         return summary
     
     @staticmethod
-    def determine_routing(extracted_data: Dict) -> Dict[str, Any]:
+    def determine_routing(extracted_data: Union[Dict, EmailDocument], rules: CompiledRules = None) -> Dict[str, Any]:
         """Determine where the email should be routed."""
+        extracted_data, rules = EmailTools._resolve_extracted_data(extracted_data, rules)
         email_type = extracted_data["email_type"]
         urgency = extracted_data["urgency"]
         compliance_issues = extracted_data["compliance_issues"]
@@ -72,18 +98,10 @@ class EmailTools:
         }
         
         # Route based on email type
-        if email_type == "Submission":
-            routing["team"] = "Underwriting"
-        elif email_type in ["Claim", "FNOL"]:
-            routing["team"] = "Claims"
-        elif email_type in ["Policy Change", "Renewal"]:
-            routing["team"] = "Policy Administration"
-        elif email_type == "Regulatory":
-            routing["team"] = "Compliance"
+        routing["team"] = rules.teams.get(email_type, rules.default_team)
+        if email_type in rules.manual_review_types:
             routing["requires_manual_review"] = True
-            routing["reason"].append("Regulatory email requires compliance review")
-        else:  # Inquiry or Other
-            routing["team"] = "Customer Service"
+            routing["reason"].append(rules.manual_review_types[email_type])
         
         # Adjust for compliance issues
         if compliance_issues:
@@ -91,29 +109,20 @@ class EmailTools:
             routing["reason"].append(f"Compliance issues detected: {', '.join(compliance_issues)}")
         
         # High urgency emails might need special handling
-        if urgency == "High":
+        if urgency == "High" and rules.high_urgency_review:
             routing["requires_manual_review"] = True
             routing["reason"].append("High urgency email requires immediate attention")
         
         return routing
     
     @staticmethod
-    def suggest_response_template(extracted_data: Dict) -> str:
+    def suggest_response_template(extracted_data: Union[Dict, EmailDocument], rules: CompiledRules = None) -> str:
         """Suggest a response template based on the email analysis."""
+        extracted_data, rules = EmailTools._resolve_extracted_data(extracted_data, rules)
         email_type = extracted_data["email_type"]
         structured_data = extracted_data["structured_data"]
         
-        templates = {
-            "Submission": "Thank you for your submission. We have received your request and will review the details. A broker will contact you shortly regarding {policy_details}.",
-            "Claim": "We acknowledge receipt of your claim notification. Your claim ({claim_id}) has been logged and assigned to a claims handler who will be in touch within 24 hours.",
-            "FNOL": "We have received your First Notice of Loss. A claims representative will contact you within 24 hours to gather additional information and guide you through the next steps.",
-            "Policy Change": "Thank you for your policy change request for Policy {policy_number}. We are processing your request and will confirm the changes shortly.",
-            "Renewal": "We acknowledge receipt of your renewal request for Policy {policy_number}. We will process this promptly and provide updated terms before the renewal date.",
-            "Regulatory": "Your message has been received and forwarded to our compliance team for immediate review.",
-            "Inquiry": "Thank you for your inquiry. We aim to respond to all queries within 1 business day."
-        }
-        
-        template = templates.get(email_type, templates["Inquiry"])
+        template = rules.templates.get(email_type, rules.default_template)
         
         # Fill in template placeholders with actual data
         if "{policy_number}" in template and structured_data["policy_number"]:
@@ -133,21 +142,42 @@ class EmailTools:
         
         return template
     
+    @staticmethod
+    def triage_email(email_content: Union[str, EmailDocument], overrides: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Run the full deterministic triage pipeline without involving the crew.
+        
+        Args:
+            email_content: Raw email text or its EmailDocument
+            overrides: Optional values (e.g. email_type, urgency) that replace
+                       the keyword-based classification before routing
+            
+        Returns:
+            Dictionary with classification, summary, suggested_response,
+            compliance_issues and routing entries
+        """
+        document = EmailDocument.coerce(email_content)
+        extracted_data = EmailTools.extract_email_data(document)
+        if overrides:
+            extracted_data.update(overrides)
+        
+        return {
+            "classification": extracted_data,
+            "summary": EmailTools.generate_email_summary(document, extracted_data),
+            "suggested_response": EmailTools.suggest_response_template(extracted_data, document.rules),
+            "compliance_issues": extracted_data["compliance_issues"],
+            "routing": EmailTools.determine_routing(extracted_data, document.rules)
+        }
+    
     # Private helper methods
     @staticmethod
-    def _extract_policy_info(email_text: str) -> Dict[str, Any]:
+    def _extract_policy_info(document: EmailDocument) -> Dict[str, Any]:
         """Extract policy numbers, claim IDs, and other structured data from email text."""
-        policy_pattern = r"Policy(?:\s+Number)?(?:\s*:)?\s*([A-Z0-9-]+)"
-        claim_pattern = r"Claim(?:\s+Number|ID)?(?:\s*:)?\s*([A-Z0-9-]+)"
-        date_pattern = r"(?:Due|Renewal|Effective)(?:\s+Date)?(?:\s*:)?\s*(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})"
-        
-        policy_match = re.search(policy_pattern, email_text, re.IGNORECASE)
-        claim_match = re.search(claim_pattern, email_text, re.IGNORECASE)
-        date_match = re.search(date_pattern, email_text, re.IGNORECASE)
+        policy_match = document.search(EmailTools.POLICY_PATTERN)
+        claim_match = document.search(EmailTools.CLAIM_PATTERN)
+        date_match = document.search(EmailTools.DATE_PATTERN)
         
         # Extract insured name (simplified logic)
-        insured_pattern = r"(?:Insured|Client|Customer)(?:\s+Name)?(?:\s*:)?\s*([A-Za-z0-9\s,\.]+?)(?:\n|,|;)"
-        insured_match = re.search(insured_pattern, email_text, re.IGNORECASE)
+        insured_match = document.search(EmailTools.INSURED_PATTERN)
         
         structured_data = {
             "policy_number": policy_match.group(1) if policy_match else None,
@@ -159,86 +189,45 @@ class EmailTools:
         return structured_data
     
     @staticmethod
-    def _detect_email_type(email_text: str) -> str:
+    def _detect_email_type(document: EmailDocument) -> str:
         """Determine the type of insurance email."""
-        email_text_lower = email_text.lower()
-        
-        # Define keywords for different email types
-        submission_keywords = ["new business", "submission", "quote request", "application", "risk details"]
-        claim_keywords = ["claim notification", "claim report", "incident report", "loss report"]
-        fnol_keywords = ["first notice", "fnol", "incident occurred", "accident report"]
-        policy_change_keywords = ["endorsement", "policy change", "amend coverage", "update policy"]
-        renewal_keywords = ["renewal", "policy expiring", "extend coverage"]
-        regulatory_keywords = ["compliance", "regulation", "audit", "regulator", "regulatory"]
-        
-        # Check for each type
-        if any(keyword in email_text_lower for keyword in submission_keywords):
-            return "Submission"
-        elif any(keyword in email_text_lower for keyword in fnol_keywords):
-            return "FNOL"
-        elif any(keyword in email_text_lower for keyword in claim_keywords):
-            return "Claim"
-        elif any(keyword in email_text_lower for keyword in policy_change_keywords):
-            return "Policy Change"
-        elif any(keyword in email_text_lower for keyword in renewal_keywords):
-            return "Renewal"
-        elif any(keyword in email_text_lower for keyword in regulatory_keywords):
-            return "Regulatory"
-        else:
-            return "Inquiry"
+        for email_type, matcher in document.rules.email_types:
+            if document.matches(matcher):
+                return email_type
+        return document.rules.default_email_type
     
     @staticmethod
-    def _detect_urgency(email_text: str) -> str:
+    def _detect_urgency(document: EmailDocument) -> str:
         """Determine the urgency level of the email."""
-        email_text_lower = email_text.lower()
+        rules = document.rules
+        high_priority_count = len(document.keyword_hits(rules.urgent_keywords))
         
-        urgent_keywords = ["urgent", "immediately", "asap", "emergency", "critical", 
-                          "deadline", "today", "time sensitive", "expedite", "priority"]
-        high_priority_count = sum(1 for keyword in urgent_keywords if keyword in email_text_lower)
-        
-        if high_priority_count >= 2 or "urgent" in email_text_lower:
+        if high_priority_count >= rules.high_threshold or document.matches(rules.always_high):
             return "High"
-        elif high_priority_count >= 1:
+        elif high_priority_count >= rules.medium_threshold:
             return "Medium"
         else:
             return "Normal"
     
     @staticmethod
-    def _analyze_sentiment(email_text: str) -> str:
+    def _analyze_sentiment(document: EmailDocument) -> str:
         """Analyze sentiment of the email (simplified)."""
-        email_text_lower = email_text.lower()
-        
-        negative_words = ["dissatisfied", "unhappy", "disappointed", "frustrated", 
-                          "complaint", "error", "mistake", "delay", "poor", "issue"]
-        positive_words = ["thank", "appreciate", "happy", "pleased", "satisfied", 
-                          "excellent", "good", "great", "helpful"]
-        
-        negative_count = sum(1 for word in negative_words if word in email_text_lower)
-        positive_count = sum(1 for word in positive_words if word in email_text_lower)
+        rules = document.rules
+        negative_count = len(document.keyword_hits(rules.negative_words))
+        positive_count = len(document.keyword_hits(rules.positive_words))
         
-        if negative_count > positive_count + 1:
+        if negative_count > positive_count + rules.sentiment_margin:
             return "Negative"
-        elif positive_count > negative_count + 1:
+        elif positive_count > negative_count + rules.sentiment_margin:
             return "Positive"
         else:
             return "Neutral"
     
     @staticmethod
-    def _detect_compliance_issues(email_text: str) -> List[str]:
+    def _detect_compliance_issues(document: EmailDocument) -> List[str]:
         """Identify potential compliance or regulatory issues in the email."""
-        email_text_lower = email_text.lower()
-        
-        compliance_keywords = {
-            "GDPR": ["gdpr", "personal data", "data protection", "privacy", "right to be forgotten"],
-            "Money Laundering": ["money laundering", "suspicious transaction", "aml", "kyc"],
-            "Fraud": ["fraud", "suspicious", "misrepresentation", "false"],
-            "Sanctions": ["sanction", "restricted", "ofac", "embargo"],
-            "Regulatory": ["fca", "regulation", "compliance", "regulatory", "lloyd's market"]
-        }
-        
-        issues = []
-        for issue_type, keywords in compliance_keywords.items():
-            if any(keyword in email_text_lower for keyword in keywords):
-                issues.append(issue_type)
-        
-        return issues
\ No newline at end of file
+        return [
+            issue_type
+            for issue_type, matcher in document.rules.compliance
+            if document.matches(matcher)
+        ]
\ No newline at end of file
@@ -1,14 +1,29 @@
+import os
 import json
+import time
+import random
+import logging
 import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from crewai import Crew, Process
 from crewai import Agent, Task, Crew
-efrom langchain.tools import Tool
+from langchain.tools import Tool
 
 from insurance_triage.utils.config_loader import ConfigLoader
-from insurance_triage.agents.agent_factory import AgentFactory
+from insurance_triage.agents.agents_factory import AgentFactory
 from insurance_triage.tasks.task_factory import TaskFactory
-from insurance_triage.tools.email_tools import EmailTools
+from insurance_triage.tasks.batch_classification import ClassificationBatcher
+from insurance_triage.tools.emails_tools import EmailTools
+from insurance_triage.tools.email_classifier import EmailClassifier
+from insurance_triage.tools.email_document import EmailDocument
+from insurance_triage.utils.memory_monitor import MemoryMonitor
+from insurance_triage.utils.load_shedding import OverloadController
+from insurance_triage.utils.rules import RulesRegistry, set_rules_registry
+from insurance_triage.dispatch import DispatchStage
+from insurance_triage.utils.work_queue import make_email_id
+from insurance_triage.utils.structured_logging import configure_logging, correlation_context
+
+logger = logging.getLogger(__name__)
 
 class InsuranceEmailTriageCrew:
     """Main class for the insurance email triage system."""
@@ -24,16 +39,119 @@ class InsuranceEmailTriageCrew:
         self.config_loader = ConfigLoader(config_dir)
         self.configs = self.config_loader.load_all_configs()
         
+        # Start the background JSON log writer
+        logging_config = self.configs.get('config', {}).get('logging', {})
+        configure_logging(logging_config, self.config_loader.config_dir)
+        self.transcript_sample_rate = logging_config.get('transcript_sample_rate', 1.0)
+        
+        # Bounded-memory mode drops per-email state eagerly and disables verbose transcripts
+        memory_config = self.configs.get('config', {}).get('memory', {})
+        self.bounded_memory = memory_config.get('bounded_mode', False)
+        self.memory_monitor = self._create_memory_monitor(memory_config)
+        
+        # Compile the keyword, routing and template rules; a running crew picks up
+        # edits to the rules file without a restart
+        rules_config = self.configs.get('config', {}).get('rules', {})
+        self.rules = RulesRegistry(self.config_loader, rules_config.get('file', 'rules.yaml'))
+        set_rules_registry(self.rules)
+        if rules_config.get('hot_reload', True):
+            self.rules.start_watching(rules_config.get('reload_interval_seconds', 5.0))
+        
         # Create tools
         self.tools = self._create_tools()
         
         # Create agents
+        agents_config = self.configs.get('agents', {})
+        if self.bounded_memory:
+            agents_config = {name: {**config, "verbose": False} for name, config in agents_config.items()}
         agent_factory = AgentFactory(self.tools)
-        self.agents_dict = agent_factory.create_agents_from_config(self.configs.get('agents', {}))
+        self.agents_dict = agent_factory.create_agents_from_config(agents_config)
         self.agents = list(self.agents_dict.values())
+        self._agent_verbose = [agent.verbose for agent in self.agents]
         
         # Initialize task factory
         self.task_factory = TaskFactory(self.agents_dict)
+        
+        # Load the optional local classifier tier
+        classifier_config = self.configs.get('config', {}).get('classifier', {})
+        self.classifier = self._load_classifier(classifier_config)
+        self.classifier_threshold = classifier_config.get('confidence_threshold', 0.85)
+        
+        # Optionally pack several emails into each classification call
+        batching_config = self.configs.get('config', {}).get('classification_batching', {})
+        self.classification_task = batching_config.get('task', 'classification_task')
+        self.classification_batcher = self._create_classification_batcher(batching_config)
+        
+        # Degrade low-urgency email to rules-only triage when the crew falls behind
+        shedding_config = self.configs.get('config', {}).get('load_shedding', {})
+        self.overload_controller = None
+        if shedding_config.get('enabled', False):
+            self.overload_controller = OverloadController(
+                latency_slo_seconds=shedding_config.get('latency_slo_seconds', 300),
+                max_queue_depth=shedding_config.get('max_queue_depth', 500),
+                recover_ratio=shedding_config.get('recover_ratio', 0.5),
+                initial_latency_seconds=shedding_config.get('initial_latency_seconds', 10.0),
+                num_workers=shedding_config.get('num_workers', 1)
+            )
+        
+        # Optionally write routed results to per-team durable outboxes
+        dispatch_config = self.configs.get('config', {}).get('dispatch', {})
+        self.dispatcher = None
+        if dispatch_config.get('enabled', False):
+            self.dispatcher = DispatchStage.from_config(dispatch_config, self.config_loader.config_dir)
+    
+    def _create_classification_batcher(self, batching_config: Dict[str, Any]) -> Optional[ClassificationBatcher]:
+        """Create the micro-batcher for the classification task if it is enabled."""
+        if not batching_config.get('enabled', False):
+            return None
+        
+        task_config = self.configs.get('tasks', {}).get(self.classification_task)
+        if task_config is None:
+            raise ValueError(f"Classification batching is enabled but task '{self.classification_task}' is not configured")
+        agent_name = task_config.get("agent")
+        if agent_name not in self.agents_dict:
+            raise ValueError(f"Agent '{agent_name}' not found for task '{self.classification_task}'")
+        
+        return ClassificationBatcher(
+            self.agents_dict[agent_name],
+            task_config,
+            max_items=batching_config.get('max_items', 8),
+            verbose=not self.bounded_memory and self.transcript_sample_rate >= 1.0
+        )
+    
+    def _create_memory_monitor(self, memory_config: Dict[str, Any]) -> Optional[MemoryMonitor]:
+        """Create the memory monitor if profiling or periodic collection is configured."""
+        profiling_config = memory_config.get('profiling', {})
+        gc_every = memory_config.get('gc_every', 0) if self.bounded_memory else 0
+        if not profiling_config.get('enabled', False) and not gc_every:
+            return None
+        
+        monitor = MemoryMonitor(
+            sample_every=profiling_config.get('sample_every', 500) if profiling_config.get('enabled', False) else 0,
+            top_n=profiling_config.get('top_n', 10),
+            trace_allocations=profiling_config.get('enabled', False) and profiling_config.get('tracemalloc', True),
+            gc_every=gc_every
+        )
+        monitor.add_hook(self._report_memory_sample)
+        return monitor
+    
+    @staticmethod
+    def _report_memory_sample(report: Dict[str, Any]):
+        """Default memory sample hook: log the sample as a structured record."""
+        logger.info("Memory sample", extra={"fields": {"event": "memory_sample", **report}})
+    
+    def _load_classifier(self, classifier_config: Dict[str, Any]) -> Optional[EmailClassifier]:
+        """Load the trained local classifier if it is enabled in the configuration."""
+        if not classifier_config.get('enabled', False):
+            return None
+        
+        model_path = classifier_config.get('model_path')
+        if not model_path:
+            raise ValueError("Classifier is enabled but no model_path is configured")
+        if not os.path.isabs(model_path):
+            model_path = os.path.join(self.config_loader.config_dir, model_path)
+        
+        return EmailClassifier.load(model_path)
     
     def _create_tools(self) -> Dict[str, Tool]:
         """Create and initialize tools from the tools configuration."""
@@ -66,20 +184,162 @@ class InsuranceEmailTriageCrew:
         
         return tools_dict
     
-    def process_single_email(self, email_content: str, email_metadata: Dict = None):
-        """Process a single email through the triage system."""
+    def _triage_locally(self, document: EmailDocument, email_metadata: Dict, triage_tier: str,
+                        overrides: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Triage an email with the deterministic EmailTools pipeline."""
+        result = EmailTools.triage_email(document, overrides)
+        
+        return {
+            "email_metadata": email_metadata,
+            **result,
+            "triage_tier": triage_tier,
+            "processed_timestamp": datetime.datetime.now().isoformat()
+        }
+    
+    def _classify_locally(self, document: EmailDocument, email_metadata: Dict, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Triage an email with the rules, using the classifier's type and urgency."""
+        result = self._triage_locally(
+            document,
+            email_metadata,
+            "classifier",
+            overrides={"email_type": prediction["email_type"], "urgency": prediction["urgency"]}
+        )
+        result["classification"]["classifier_confidence"] = prediction["confidence"]
+        return result
+    
+    def _should_shed(self, document: EmailDocument) -> bool:
+        """Whether the overload controller wants this email kept off the crew."""
+        if self.overload_controller is None:
+            return False
+        extracted_data = EmailTools.extract_email_data(document)
+        return self.overload_controller.should_shed(extracted_data["urgency"], extracted_data["compliance_issues"])
+    
+    def process_single_email(self, email_content: str, email_metadata: Dict = None, prediction: Dict[str, Any] = None,
+                             classification_output: str = None, force_full_triage: bool = False,
+                             defer_shed: bool = True):
+        """
+        Process a single email through the triage system.
+        
+        When the local classifier is enabled and confident enough, the email is
+        settled without calling the crew. While the overload controller is
+        shedding load, Normal and Medium urgency emails without compliance
+        flags get rules-only triage and are queued for crew re-triage later.
+        Everything else is escalated to the crew.
+        
+        Args:
+            email_content: Raw email text
+            email_metadata: Optional sender, subject and timing information. An
+                            email_id is derived from the email when missing
+            prediction: Optional precomputed classifier prediction for this email
+            classification_output: Optional output of the classification task
+                                   obtained from a batched call; the crew then
+                                   skips that task
+            force_full_triage: Always use the crew, bypassing the classifier and load shedding
+            defer_shed: Keep shed emails in the overload controller's in-memory
+                        re-triage list. The worker passes False because its
+                        queue parks them durably instead
+        """
         if email_metadata is None:
             email_metadata = {
+                "email_id": make_email_id({"content": email_content}),
                 "sender": "unknown@example.com",
                 "received_time": datetime.datetime.now().isoformat(),
                 "subject": "Unknown Subject",
                 "has_attachments": False
             }
+        elif not email_metadata.get("email_id"):
+            # A stable id keys the dispatch outboxes, so replays never duplicate an email
+            email_metadata = {**email_metadata, "email_id": make_email_id({**email_metadata, "content": email_content})}
+        
+        start = time.perf_counter()
+        with correlation_context(email_metadata["email_id"]) as correlation_id:
+            try:
+                # Every local stage shares one analysis of the email
+                document = EmailDocument.for_text(email_content)
+                if force_full_triage:
+                    prediction = None
+                elif prediction is None and self.classifier is not None:
+                    prediction = self.classifier.predict_batch([document])[0]
+                
+                if prediction is not None and prediction["confidence"] >= self.classifier_threshold:
+                    result = self._classify_locally(document, email_metadata, prediction)
+                elif not force_full_triage and self._should_shed(document):
+                    # Overloaded: answer with the rules now and re-triage with the crew later
+                    result = self._triage_locally(document, email_metadata, "rules")
+                    result["retriage_pending"] = True
+                    if defer_shed and not self.overload_controller.defer({
+                        "content": email_content,
+                        "metadata": email_metadata,
+                        "correlation_id": correlation_id
+                    }):
+                        logger.warning("Re-triage list is full; keeping the rules result", extra={"fields": {
+                            "event": "retriage_dropped"
+                        }})
+                        result["retriage_pending"] = False
+                else:
+                    crew_start = time.perf_counter()
+                    result = self._run_crew(email_content, email_metadata, classification_output)
+                    if self.overload_controller is not None:
+                        self.overload_controller.observe_latency(time.perf_counter() - crew_start)
+            finally:
+                self._release_email_state()
+            
+            result["correlation_id"] = correlation_id
+            self._log_result(result, time.perf_counter() - start)
+        
+        return result
+    
+    @staticmethod
+    def _log_result(result: Dict[str, Any], elapsed_seconds: float):
+        """Emit one structured record summarizing how an email was triaged."""
+        if "error" in result:
+            logger.error("Email triage failed", extra={"fields": {
+                "event": "email_failed",
+                "error": result["error"],
+                "duration_ms": round(elapsed_seconds * 1000, 2)
+            }})
+            return
+        
+        routing = result.get("routing") or {}
+        classification = result.get("classification") or {}
+        logger.info("Email triaged", extra={"fields": {
+            "event": "email_triaged",
+            "subject": result.get("email_metadata", {}).get("subject"),
+            "triage_tier": result.get("triage_tier"),
+            "email_type": classification.get("email_type") if isinstance(classification, dict) else None,
+            "team": routing.get("team") if isinstance(routing, dict) else None,
+            "requires_manual_review": routing.get("requires_manual_review") if isinstance(routing, dict) else None,
+            "retriage_pending": result.get("retriage_pending", False),
+            "duration_ms": round(elapsed_seconds * 1000, 2)
+        }})
+    
+    def _sample_transcript(self) -> bool:
+        """Decide whether this email's agent transcript should be printed."""
+        if self.bounded_memory:
+            return False
+        return random.random() < self.transcript_sample_rate
+    
+    def _release_email_state(self):
+        """Per-email cleanup and memory accounting after an email has been processed."""
+        if self.bounded_memory:
+            # The task factory keeps the last tasks (and their email bodies) for context lookups
+            self.task_factory.clear()
+        
+        if self.memory_monitor is not None:
+            self.memory_monitor.record_email()
+    
+    def _run_crew(self, email_content: str, email_metadata: Dict, classification_output: str = None) -> Dict[str, Any]:
+        """Run the full agent crew on an email and format its task outputs."""
+        tasks_config = self.configs.get('tasks', {})
+        precomputed_outputs = {}
+        if classification_output is not None:
+            precomputed_outputs[self.classification_task] = classification_output
         
         # Create tasks for this email
         tasks = self.task_factory.create_tasks_from_config(
-            self.configs.get('tasks', {}),
-            email_content
+            tasks_config,
+            email_content,
+            precomputed_outputs
         )
         
         # Create and run the crew
@@ -87,22 +347,42 @@ class InsuranceEmailTriageCrew:
         process_type_str = crew_config.get('process', 'sequential')
         process_type = Process.sequential if process_type_str.lower() == 'sequential' else Process.hierarchical
         
+        # Only a sampled fraction of emails produce verbose agent transcripts
+        transcript = self._sample_transcript()
+        for agent, verbose in zip(self.agents, self._agent_verbose):
+            agent.verbose = verbose and transcript
+        
+        # A Crew binds its task list when it is built, so each email gets its own.
+        # It is only referenced from this call; with the task factory cleared in
+        # bounded mode, nothing built for this email outlives it.
         crew = Crew(
             agents=self.agents,
             tasks=tasks,
-            verbose=crew_config.get('verbose', True),
+            verbose=crew_config.get('verbose', True) and transcript,
             process=process_type
         )
         
         result = crew.kickoff()
         
+        # Token usage lets offline evaluation compare tiers on cost
+        token_usage = getattr(crew, "usage_metrics", None)
+        if hasattr(token_usage, "model_dump"):
+            token_usage = token_usage.model_dump()
+        
+        # Line the outputs back up with the configured task order
+        task_outputs = iter(task.output for task in tasks)
+        outputs = [
+            precomputed_outputs[task_name] if task_name in precomputed_outputs else next(task_outputs)
+            for task_name in tasks_config
+        ]
+        
         # Format the results
         try:
             # Extract results from each task
-            classification_data = json.loads(tasks[0].output) if isinstance(tasks[0].output, str) else tasks[0].output
-            insights_data = tasks[1].output
-            compliance_data = tasks[2].output
-            routing_data = json.loads(tasks[3].output) if isinstance(tasks[3].output, str) else tasks[3].output
+            classification_data = json.loads(outputs[0]) if isinstance(outputs[0], str) else outputs[0]
+            insights_data = outputs[1]
+            compliance_data = outputs[2]
+            routing_data = json.loads(outputs[3]) if isinstance(outputs[3], str) else outputs[3]
             
             # Parse insights data - it might be a string or a dict
             if isinstance(insights_data, str):
@@ -127,6 +407,8 @@ class InsuranceEmailTriageCrew:
                 "suggested_response": template,
                 "compliance_issues": compliance_data,
                 "routing": routing_data,
+                "triage_tier": "crew",
+                "token_usage": token_usage,
                 "processed_timestamp": datetime.datetime.now().isoformat()
             }
             
@@ -134,23 +416,112 @@ class InsuranceEmailTriageCrew:
             
         except Exception as e:
             return {
+                "email_metadata": email_metadata,
                 "error": f"Error formatting results: {str(e)}",
-                "raw_results": [task.output for task in tasks]
+                "raw_results": outputs
             }
     
+    def prepare_batch(self, emails: List[Dict[str, Any]],
+                      backlog: int = 0) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+        """
+        Run the batched stages for several emails ahead of process_single_email().
+        
+        Args:
+            emails: Emails about to be processed, in order
+            backlog: Emails waiting behind this batch, used for shedding decisions
+            
+        Returns:
+            Classifier predictions and batched classification outputs, one per
+            email (None where the stage is disabled or does not apply)
+        """
+        # Score the whole batch with the local classifier in one vectorized pass
+        predictions = [None] * len(emails)
+        if self.classifier is not None and emails:
+            predictions = self.classifier.predict_batch(
+                [EmailDocument.for_text(email.get("content", "")) for email in emails]
+            )
+        
+        # Emails escalated to the crew share batched classification calls. Emails
+        # that will be shed skip the batch, as they never reach the crew.
+        classification_outputs = [None] * len(emails)
+        if self.classification_batcher is not None:
+            escalated = []
+            for i, (email, prediction) in enumerate(zip(emails, predictions)):
+                if prediction is not None and prediction["confidence"] >= self.classifier_threshold:
+                    continue
+                if self.overload_controller is not None:
+                    self.overload_controller.update_queue_depth(backlog + len(emails) - i)
+                    if self._should_shed(EmailDocument.for_text(email.get("content", ""))):
+                        continue
+                escalated.append(i)
+            batched = self.classification_batcher.classify_many([emails[i].get("content", "") for i in escalated])
+            for i, output in zip(escalated, batched):
+                classification_outputs[i] = output
+        
+        return predictions, classification_outputs
+    
     def batch_process_emails(self, emails: List[Dict[str, Any]]):
         """Process multiple emails in batch."""
+        predictions, classification_outputs = self.prepare_batch(emails)
+        
         results = []
-        for email in emails:
+        for i, (email, prediction, classification_output) in enumerate(zip(emails, predictions, classification_outputs)):
+            if self.overload_controller is not None:
+                self.overload_controller.update_queue_depth(len(emails) - i)
+            
             content = email.get("content", "")
             metadata = {
+                # Derived before any defaults are filled in, so it matches the queue's item id
+                "email_id": make_email_id(email),
                 "sender": email.get("sender", "unknown@example.com"),
                 "received_time": email.get("received_time", datetime.datetime.now().isoformat()),
                 "subject": email.get("subject", "Unknown Subject"),
                 "has_attachments": email.get("has_attachments", False)
             }
             
-            result = self.process_single_email(content, metadata)
+            result = self.process_single_email(content, metadata, prediction, classification_output)
             results.append(result)
+        
+        if self.dispatcher is not None:
+            self.dispatcher.dispatch(results)
+            
+        return results
+    
+    def retriage_deferred(self, max_items: int = None) -> List[Dict[str, Any]]:
+        """
+        Re-run shed emails through the full crew once load has dropped.
+        
+        Nothing is processed while the overload controller is still shedding.
+        
+        Args:
+            max_items: Optional limit on the number of emails re-triaged
             
+        Returns:
+            Crew results for the emails re-triaged successfully, already
+            dispatched when dispatch is enabled; failed emails are deferred again
+        """
+        if self.overload_controller is None:
+            return []
+        
+        results = []
+        for deferred in self.overload_controller.pop_deferred(max_items):
+            with correlation_context(deferred["correlation_id"]):
+                try:
+                    result = self.process_single_email(deferred["content"], deferred["metadata"], force_full_triage=True)
+                except Exception:
+                    logger.exception("Re-triage failed; deferring the email again")
+                    result = None
+                
+                # A failed re-triage must not replace the rules result
+                if result is None or "error" in result:
+                    self.overload_controller.defer(deferred)
+                    continue
+            
+            result["retriage_of"] = deferred["correlation_id"]
+            results.append(result)
+        
+        # The improved results are delivered alongside the earlier rules results
+        if self.dispatcher is not None and results:
+            self.dispatcher.dispatch(results)
+        
         return results
\ No newline at end of file
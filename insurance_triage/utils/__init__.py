@@ -1,10 +1 @@
-"""
-Insurance Email Triage System
-
-A system for automatically categorizing, analyzing, and routing insurance-related emails
-using AI agents via the CrewAI framework.
-"""
-
-from insurance_triage.triage_crew import InsuranceEmailTriageCrew
-
-__version__ = '0.1.0'
\ No newline at end of file
+"""Configuration, queueing, logging and runtime utilities for the insurance email triage system."""
@@ -1,7 +1,12 @@
 import os
 import yaml
+import logging
 from typing import Dict, Any
 
+from insurance_triage.utils.rules import CompiledRules
+
+logger = logging.getLogger(__name__)
+
 class ConfigLoader:
     """Load and parse YAML configuration files for the email triage system."""
     
@@ -42,6 +47,18 @@ class ConfigLoader:
         except yaml.YAMLError as e:
             raise ValueError(f"Error parsing YAML file {config_path}: {e}")
     
+    def load_rules(self, rules_file: str = 'rules.yaml') -> CompiledRules:
+        """
+        Load the triage rules and compile them into matchers and lookup tables.
+        
+        Args:
+            rules_file: Name of the rules file
+            
+        Returns:
+            Compiled rules, ready to be shared between threads
+        """
+        return CompiledRules(self.load_config(rules_file) or {})
+    
     def load_all_configs(self) -> Dict[str, Any]:
         """
         Load all configuration files in the config directory.
@@ -63,6 +80,6 @@ class ConfigLoader:
                 config_name = os.path.splitext(config_file)[0]  # Remove extension
                 all_configs[config_name] = config_data
             except FileNotFoundError:
-                print(f"Warning: Config file {config_file} not found. Skipping.")
+                logger.warning("Config file %s not found. Skipping.", config_file)
                 
         return all_configs
\ No newline at end of file
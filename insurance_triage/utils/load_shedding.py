@@ -0,0 +1,124 @@
+import threading
+from collections import deque
+from typing import Dict, List, Any, Sequence
+
+# Urgency levels (as judged by EmailTools._detect_urgency) that may be degraded
+SHEDDABLE_URGENCIES = ("Normal", "Medium")
+
+
+class OverloadController:
+    """
+    Decide when to degrade low-urgency email to rules-only triage.
+
+    The controller tracks the backlog depth and a moving average of crew
+    latency. Their product, divided by the number of workers draining the
+    backlog, estimates how long a newly arrived email would wait for the crew. When that estimate breaks the SLA (or the backlog
+    exceeds its hard cap) the controller enters shedding mode, and only
+    leaves it once both signals fall below a lower recovery level, so it does
+    not flap around the threshold.
+    """
+
+    def __init__(self, latency_slo_seconds: float = 300, max_queue_depth: int = 500,
+                 recover_ratio: float = 0.5, ewma_alpha: float = 0.2,
+                 initial_latency_seconds: float = 10.0, max_deferred: int = 100000,
+                 num_workers: int = 1):
+        """
+        Initialize the controller.
+
+        Args:
+            latency_slo_seconds: Target time for an email to get full crew treatment
+            max_queue_depth: Backlog size that triggers shedding regardless of latency
+            recover_ratio: Fraction of both limits that must be reached to stop shedding
+            ewma_alpha: Smoothing factor for the crew latency moving average
+            initial_latency_seconds: Crew latency assumed before any observation
+            max_deferred: Maximum number of emails kept for later re-triage
+            num_workers: Workers (across all hosts) that share the backlog
+        """
+        self.latency_slo_seconds = latency_slo_seconds
+        self.max_queue_depth = max_queue_depth
+        self.recover_ratio = recover_ratio
+        self.ewma_alpha = ewma_alpha
+        self.crew_latency_seconds = initial_latency_seconds
+        self.queue_depth = 0
+        self.shedding = False
+        self.max_deferred = max_deferred
+        self.num_workers = max(num_workers, 1)
+        self.deferred = deque()
+        self._lock = threading.Lock()
+
+    def observe_latency(self, seconds: float) -> None:
+        """Record how long one full crew run took."""
+        with self._lock:
+            self.crew_latency_seconds += self.ewma_alpha * (seconds - self.crew_latency_seconds)
+            self._update()
+
+    def update_queue_depth(self, depth: int) -> None:
+        """Record the number of emails currently waiting."""
+        with self._lock:
+            self.queue_depth = depth
+            self._update()
+
+    def estimated_wait_seconds(self) -> float:
+        """Expected time for the current backlog to clear through the crew."""
+        return self.queue_depth * self.crew_latency_seconds / self.num_workers
+
+    def _update(self) -> None:
+        """Enter or leave shedding mode; the caller must hold the lock."""
+        wait = self.estimated_wait_seconds()
+        if not self.shedding:
+            self.shedding = wait > self.latency_slo_seconds or self.queue_depth > self.max_queue_depth
+        else:
+            recovered = (
+                wait < self.latency_slo_seconds * self.recover_ratio
+                and self.queue_depth < self.max_queue_depth * self.recover_ratio
+            )
+            self.shedding = not recovered
+
+    def should_shed(self, urgency: str, compliance_issues: Sequence[str]) -> bool:
+        """
+        Whether an email should skip the crew right now.
+
+        High-urgency and compliance-flagged emails always keep full treatment.
+        """
+        return self.shedding and urgency in SHEDDABLE_URGENCIES and not compliance_issues
+
+    def defer(self, email: Dict[str, Any]) -> bool:
+        """
+        Remember a shed email so it can be re-triaged by the crew later.
+
+        Returns:
+            False if the re-triage list is full and the email was not kept
+        """
+        with self._lock:
+            if len(self.deferred) >= self.max_deferred:
+                return False
+            self.deferred.append(email)
+            return True
+
+    def pop_deferred(self, max_items: int = None) -> List[Dict[str, Any]]:
+        """
+        Take emails due for re-triage, but only while not shedding.
+
+        Args:
+            max_items: Optional limit on the number of emails returned
+
+        Returns:
+            Deferred emails in the order they were shed
+        """
+        emails = []
+        with self._lock:
+            while self.deferred and not self.shedding:
+                if max_items is not None and len(emails) >= max_items:
+                    break
+                emails.append(self.deferred.popleft())
+        return emails
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of the controller state for logging."""
+        return {
+            "shedding": self.shedding,
+            "queue_depth": self.queue_depth,
+            "crew_latency_seconds": round(self.crew_latency_seconds, 3),
+            "estimated_wait_seconds": round(self.estimated_wait_seconds(), 3),
+            "deferred": len(self.deferred)
+        }
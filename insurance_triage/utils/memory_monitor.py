@@ -0,0 +1,116 @@
+import gc
+import os
+import resource
+import tracemalloc
+from collections import deque
+from typing import Dict, Any, List, Callable, Optional
+
+
+def current_rss_bytes() -> int:
+    """
+    Return the resident set size of this process in bytes.
+
+    Reads /proc/self/statm where available; elsewhere falls back to the peak
+    RSS reported by getrusage, which is an upper bound on the current value.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class MemoryMonitor:
+    """Sample process memory every N emails and report the top allocators."""
+
+    def __init__(self, sample_every: int = 500, top_n: int = 10, trace_allocations: bool = True,
+                 gc_every: int = 0, max_samples: int = 100):
+        """
+        Initialize the monitor.
+
+        Args:
+            sample_every: Number of processed emails between samples (0 disables sampling)
+            top_n: Number of top allocation sites to include in each sample
+            trace_allocations: Start tracemalloc so samples include allocation sites
+            gc_every: Run a full garbage collection every N emails (0 disables it)
+            max_samples: Number of most recent samples kept in memory
+        """
+        self.sample_every = sample_every
+        self.top_n = top_n
+        self.trace_allocations = trace_allocations
+        self.gc_every = gc_every
+        self.emails_processed = 0
+        self.samples = deque(maxlen=max_samples)
+        self.hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._started_tracing = False
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def add_hook(self, hook: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callable that receives every sample report."""
+        self.hooks.append(hook)
+
+    def record_email(self) -> Optional[Dict[str, Any]]:
+        """
+        Count one processed email, collecting garbage and sampling when due.
+
+        Returns:
+            The sample report if one was taken, otherwise None
+        """
+        self.emails_processed += 1
+
+        if self.gc_every and self.emails_processed % self.gc_every == 0:
+            gc.collect()
+
+        if self.sample_every and self.emails_processed % self.sample_every == 0:
+            return self.sample()
+        return None
+
+    def sample(self) -> Dict[str, Any]:
+        """
+        Take a memory sample now and pass it to the registered hooks.
+
+        Returns:
+            Dictionary with the email count, RSS, traced memory and top allocators
+        """
+        report = {
+            "emails_processed": self.emails_processed,
+            "rss_bytes": current_rss_bytes(),
+            "traced_current_bytes": None,
+            "traced_peak_bytes": None,
+            "top_allocators": []
+        }
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["traced_current_bytes"] = current
+            report["traced_peak_bytes"] = peak
+
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            for stat in snapshot.statistics("lineno")[:self.top_n]:
+                frame = stat.traceback[0]
+                report["top_allocators"].append({
+                    "location": f"{frame.filename}:{frame.lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count
+                })
+
+        self.samples.append(report)
+        for hook in self.hooks:
+            hook(report)
+
+        return report
+
+    def stop(self) -> None:
+        """Stop allocation tracing if this monitor started it."""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
@@ -0,0 +1,191 @@
+import os
+import re
+import logging
+import itertools
+import threading
+from typing import Dict, Any, Optional, Pattern, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_versions = itertools.count(1)
+
+
+def compile_keywords(keywords: Sequence[str]) -> Pattern:
+    """
+    Compile keywords into one case-insensitive substring matcher.
+
+    Matching the compiled pattern against lowercased text is equivalent to
+    checking `keyword in text` for each keyword, but takes a single scan.
+    """
+    keywords = [str(keyword).lower() for keyword in keywords]
+    if not keywords:
+        return re.compile(r"(?!)")
+    # Longest first so a keyword is never shadowed by one of its prefixes
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(keyword) for keyword in ordered))
+
+
+class CompiledRules:
+    """
+    Immutable matcher and lookup tables built from rules.yaml.
+
+    A rules object is never modified after construction; reloading builds a
+    new one and swaps it in, so an email being processed keeps a consistent
+    view of the rules it started with.
+    """
+
+    def __init__(self, rules_config: Dict[str, Any]):
+        """
+        Compile a rules configuration.
+
+        Args:
+            rules_config: Parsed contents of rules.yaml
+
+        Raises:
+            ValueError: If a required section is missing or malformed
+        """
+        try:
+            self.email_types: Tuple[Tuple[str, Pattern], ...] = tuple(
+                (entry["type"], compile_keywords(entry["keywords"])) for entry in rules_config["email_types"]
+            )
+            self.default_email_type: str = rules_config.get("default_email_type", "Inquiry")
+
+            urgency = rules_config["urgency"]
+            self.urgent_keywords: Tuple[str, ...] = tuple(k.lower() for k in urgency["keywords"])
+            self.always_high: Pattern = compile_keywords(urgency.get("always_high", []))
+            self.high_threshold: int = int(urgency.get("high_threshold", 2))
+            self.medium_threshold: int = int(urgency.get("medium_threshold", 1))
+
+            sentiment = rules_config["sentiment"]
+            self.negative_words: Tuple[str, ...] = tuple(k.lower() for k in sentiment["negative"])
+            self.positive_words: Tuple[str, ...] = tuple(k.lower() for k in sentiment["positive"])
+            self.sentiment_margin: int = int(sentiment.get("margin", 1))
+
+            self.compliance: Tuple[Tuple[str, Pattern], ...] = tuple(
+                (category, compile_keywords(keywords)) for category, keywords in rules_config["compliance"].items()
+            )
+
+            routing = rules_config["routing"]
+            self.teams: Dict[str, str] = dict(routing["teams"])
+            self.default_team: str = routing["default_team"]
+            self.manual_review_types: Dict[str, str] = dict(routing.get("manual_review_types") or {})
+            self.high_urgency_review: bool = bool(routing.get("high_urgency_review", True))
+
+            self.templates: Dict[str, str] = dict(rules_config["templates"])
+            self.default_template: str = self.templates[rules_config.get("default_template", "Inquiry")]
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid rules configuration: {e!r}")
+
+        self.version = next(_versions)
+
+
+class RulesRegistry:
+    """
+    Holds the active CompiledRules and swaps in new ones when rules.yaml changes.
+
+    Readers simply take `registry.current`; the swap is a single attribute
+    assignment, so in-flight emails are never blocked by a reload.
+    """
+
+    def __init__(self, config_loader, filename: str = "rules.yaml"):
+        """
+        Load and compile the initial rules.
+
+        Args:
+            config_loader: ConfigLoader used to read the rules file
+            filename: Name of the rules file in the config directory
+        """
+        self.config_loader = config_loader
+        self.filename = filename
+        self.path = os.path.join(config_loader.config_dir, filename)
+        self._mtime = self._stat()
+        self.current: CompiledRules = config_loader.load_rules(filename)
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recompile the rules if the file changed since the last load.
+
+        A file that fails to parse or compile is logged and ignored; the
+        previous rules stay active.
+
+        Returns:
+            True if new rules were swapped in
+        """
+        with self._reload_lock:
+            mtime = self._stat()
+            if mtime is None or mtime == self._mtime:
+                return False
+
+            try:
+                rules = self.config_loader.load_rules(self.filename)
+            except Exception as e:
+                logger.error("Keeping previous rules; reload failed: %r", e)
+                self._mtime = mtime
+                return False
+
+            self._mtime = mtime
+            self.current = rules
+            logger.info("Reloaded triage rules", extra={"fields": {"event": "rules_reloaded", "version": rules.version}})
+            return True
+
+    def start_watching(self, interval_seconds: float = 5.0) -> None:
+        """Poll the rules file in a background thread and reload it on change."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval_seconds):
+                # Nothing may end the thread, or later edits would silently be ignored
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    logger.exception("Rules watcher failed to check for changes")
+
+        self._watcher = threading.Thread(target=watch, name="rules-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the background watcher."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        self._stop.clear()
+
+
+_registry: Optional[RulesRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def set_rules_registry(registry: RulesRegistry) -> None:
+    """
+    Make a registry the process-wide source of triage rules.
+
+    The watcher of the registry being replaced is stopped, so creating a new
+    crew does not leave another polling thread behind.
+    """
+    global _registry
+    with _registry_lock:
+        previous, _registry = _registry, registry
+    if previous is not None and previous is not registry:
+        previous.stop_watching()
+
+
+def get_rules() -> CompiledRules:
+    """Return the active rules, loading the default rules.yaml on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from insurance_triage.utils.config_loader import ConfigLoader
+                _registry = RulesRegistry(ConfigLoader())
+    return _registry.current
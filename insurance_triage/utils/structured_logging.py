@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import uuid
+import queue
+import atexit
+import logging
+import datetime
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional
+
+# Correlation ID of the email currently being processed in this thread/task
+_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+def get_correlation_id() -> Optional[str]:
+    """Return the correlation ID of the email currently being processed, if any."""
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_context(correlation_id: str = None):
+    """
+    Tag every log record emitted inside the block with a correlation ID.
+
+    If no ID is given and one is already active (e.g. set by a worker for the
+    queue item it claimed), the active one is kept; otherwise a new one is
+    generated.
+    """
+    correlation_id = correlation_id or _correlation_id.get() or uuid.uuid4().hex
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller.
+
+    The correlation ID is captured on the calling thread, since the listener
+    thread that formats records has no access to the caller's context. When
+    the queue is full the record is dropped and counted instead of stalling
+    triage.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.correlation_id = _correlation_id.get()
+        # Resolve the message now so arguments are not mutated before the listener formats it
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(logging_config: Dict[str, Any] = None, base_dir: str = None) -> Optional[QueueListener]:
+    """
+    Route the package's log records through a background JSON writer.
+
+    Records are handed to an in-memory queue on the calling thread and written
+    by a listener thread, so log I/O stays off the triage hot path. Calling
+    this more than once has no effect.
+
+    Args:
+        logging_config: The 'logging' section of config.yaml
+        base_dir: Directory that a relative output path resolves against
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    logging_config = logging_config or {}
+    output = logging_config.get("output", "stderr")
+    if output == "stderr":
+        target = logging.StreamHandler(sys.stderr)
+    elif output == "stdout":
+        target = logging.StreamHandler(sys.stdout)
+    else:
+        if base_dir and not os.path.isabs(output):
+            output = os.path.join(base_dir, output)
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        target = logging.FileHandler(output)
+    target.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=logging_config.get("queue_size", 10000))
+    package_logger = logging.getLogger("insurance_triage")
+    package_logger.setLevel(logging_config.get("level", "INFO"))
+    _handler = NonBlockingQueueHandler(log_queue)
+    package_logger.addHandler(_handler)
+    package_logger.propagate = False
+
+    _listener = QueueListener(log_queue, target, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def dropped_records() -> int:
+    """Number of log records dropped so far because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the background writer.
+
+    If any records were dropped, a final record reporting how many is
+    written once the queue has drained.
+    """
+    global _listener, _handler
+    dropped = dropped_records()
+    if _handler is not None:
+        logging.getLogger("insurance_triage").removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        if dropped:
+            record = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "Log records were dropped because the log queue was full", None, None
+            )
+            record.fields = {"event": "log_records_dropped", "dropped": dropped}
+            for handler in _listener.handlers:
+                handler.handle(record)
+        _listener = None
@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+
+def make_email_id(email: Dict[str, Any]) -> str:
+    """
+    Derive a stable identifier for an email.
+
+    Uses the email's own message_id when present, otherwise a hash of the
+    sender, received time, subject and content, so the same email always maps
+    to the same key no matter which process enqueues it.
+    """
+    if email.get("message_id"):
+        return str(email["message_id"])
+
+    digest = hashlib.sha256()
+    for field in ("sender", "received_time", "subject", "content"):
+        digest.update(str(email.get(field, "")).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class WorkQueue(ABC):
+    """
+    Interface for a shared queue of emails awaiting triage.
+
+    Workers claim items under a time-limited lease. An item whose lease
+    expires before it is acknowledged (e.g. because its worker crashed)
+    becomes visible again and is re-delivered to another worker.
+
+    An item acknowledged with a provisional result (one marked
+    retriage_pending because it was shed under load) is parked for re-triage
+    rather than completed. claim_retriage() leases it again once load has
+    dropped; acking that lease replaces the provisional result, and failing
+    it parks the item for another attempt after a backoff. Re-triage attempts
+    are counted separately from first deliveries.
+
+    Backends other than SQLite (such as a Redis-compatible store) can be
+    plugged in by implementing the abstract methods.
+    """
+
+    @abstractmethod
+    def enqueue(self, email: Dict[str, Any], item_id: str = None) -> bool:
+        """Add an email to the queue. Returns False if the id was already queued."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next available item, or return None if nothing is available."""
+
+    @abstractmethod
+    def extend_lease(self, item: Dict[str, Any]) -> bool:
+        """Push back the expiry of a held lease. Returns False if the lease was lost."""
+
+    @abstractmethod
+    def ack(self, item: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """
+        Record the result for a leased item. Returns False if the lease was lost.
+
+        A result with retriage_pending set parks the item for re-triage.
+        """
+
+    @abstractmethod
+    def fail(self, item: Dict[str, Any], error: str) -> bool:
+        """Give up a leased item so it can be retried. Returns False if the lease was lost."""
+
+    @abstractmethod
+    def claim_retriage(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next item awaiting crew re-triage, or return None if there is none."""
+
+    @abstractmethod
+    def pending_count(self) -> int:
+        """Number of items waiting to be claimed, including expired leases."""
+
+    @abstractmethod
+    def in_flight_count(self) -> int:
+        """Number of first deliveries currently under an unexpired lease."""
+
+    def close(self) -> None:
+        """Release any connection held by the calling thread."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue stored in a single SQLite database file.
+
+    Safe to share between processes on the same host (and between hosts on a
+    filesystem with working POSIX locks). Claiming runs inside an IMMEDIATE
+    transaction so two workers can never hold the same item, and every
+    acknowledgement is conditional on the worker's lease token, so a result is
+    committed at most once per email even when a slow worker's lease has been
+    handed to someone else.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float = 300, max_attempts: int = 5,
+                 retriage_backoff: float = 30.0):
+        """
+        Initialize the queue, creating the database if necessary.
+
+        Args:
+            path: Path to the SQLite database file
+            visibility_timeout: Seconds a claimed item stays invisible to other workers
+            max_attempts: Deliveries after which an item is marked as failed, and
+                          re-triage attempts after which the rules result is kept
+            retriage_backoff: Seconds before a failed re-triage is retried; doubles
+                              with every further failure
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retriage_backoff = retriage_backoff
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                item_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_token TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                completed_at REAL,
+                result TEXT,
+                last_error TEXT,
+                retriage_attempts INTEGER NOT NULL DEFAULT 0,
+                retry_at REAL
+            )
+        """)
+        # Queues created before re-triage tracking lack its columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(work_items)")}
+        if "retriage_attempts" not in columns:
+            conn.execute("ALTER TABLE work_items ADD COLUMN retriage_attempts INTEGER NOT NULL DEFAULT 0")
+        if "retry_at" not in columns:
+            conn.execute("ALTER TABLE work_items ADD COLUMN retry_at REAL")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_work_items_claim ON work_items (status, lease_expires, enqueued_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return a connection owned by the current thread of the current process."""
+        # SQLite connections can cross neither a fork nor a thread, so each
+        # worker process (and its lease heartbeat thread) opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def enqueue(self, email: Dict[str, Any], item_id: str = None) -> bool:
+        item_id = item_id or make_email_id(email)
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO work_items (item_id, payload, enqueued_at) VALUES (?, ?, ?)",
+            (item_id, json.dumps(email), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Items that have exhausted their deliveries are parked as failed
+            conn.execute(
+                "UPDATE work_items SET status = 'failed', lease_token = NULL "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT item_id, payload, attempts FROM work_items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (now,)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            item_id, payload, attempts = row
+            lease_token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE work_items SET status = 'leased', lease_token = ?, lease_owner = ?, "
+                "lease_expires = ?, attempts = attempts + 1 WHERE item_id = ?",
+                (lease_token, worker_id, now + self.visibility_timeout, item_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {
+            "item_id": item_id,
+            "email": json.loads(payload),
+            "lease_token": lease_token,
+            "attempts": attempts + 1
+        }
+
+    def claim_retriage(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connection()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-triage that keeps crashing its workers is abandoned; the rules result stands
+            for item_id, result in conn.execute(
+                "SELECT item_id, result FROM work_items "
+                "WHERE status = 'retriage_leased' AND lease_expires < ? AND retriage_attempts >= ?",
+                (now, self.max_attempts)
+            ).fetchall():
+                self._abandon_retriage(conn, item_id, result, "lease expired")
+
+            # Items backing off after a failed re-triage wait until retry_at
+            row = conn.execute(
+                "SELECT item_id, payload, retriage_attempts FROM work_items "
+                "WHERE (status = 'retriage' AND (retry_at IS NULL OR retry_at <= ?)) "
+                "OR (status = 'retriage_leased' AND lease_expires < ?) "
+                "ORDER BY completed_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            item_id, payload, attempts = row
+            lease_token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE work_items SET status = 'retriage_leased', lease_token = ?, lease_owner = ?, "
+                "lease_expires = ?, retriage_attempts = retriage_attempts + 1 WHERE item_id = ?",
+                (lease_token, worker_id, now + self.visibility_timeout, item_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {
+            "item_id": item_id,
+            "email": json.loads(payload),
+            "lease_token": lease_token,
+            "attempts": attempts + 1,
+            "retriage": True
+        }
+
+    @staticmethod
+    def _abandon_retriage(conn: sqlite3.Connection, item_id: str, result: str, error: str) -> None:
+        """Complete an item with its provisional result once re-triage has been given up."""
+        result = json.loads(result)
+        result["retriage_pending"] = False
+        result["retriage_error"] = error
+        conn.execute(
+            "UPDATE work_items SET status = 'done', result = ?, last_error = ?, "
+            "lease_token = NULL, lease_expires = NULL WHERE item_id = ?",
+            (json.dumps(result, default=str), error, item_id)
+        )
+
+    def extend_lease(self, item: Dict[str, Any]) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE work_items SET lease_expires = ? "
+            "WHERE item_id = ? AND lease_token = ? AND status IN ('leased', 'retriage_leased')",
+            (time.time() + self.visibility_timeout, item["item_id"], item["lease_token"])
+        )
+        return cursor.rowcount == 1
+
+    def ack(self, item: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE work_items SET status = ?, result = ?, completed_at = ?, lease_token = NULL, "
+            "retriage_attempts = 0, retry_at = NULL "
+            "WHERE item_id = ? AND lease_token = ? AND status IN ('leased', 'retriage_leased')",
+            (
+                "retriage" if result.get("retriage_pending") else "done",
+                json.dumps(result, default=str),
+                time.time(),
+                item["item_id"],
+                item["lease_token"]
+            )
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, item: Dict[str, Any], error: str) -> bool:
+        exhausted = item["attempts"] >= self.max_attempts
+        if not item.get("retriage"):
+            cursor = self._connection().execute(
+                "UPDATE work_items SET status = ?, last_error = ?, lease_token = NULL, lease_expires = NULL "
+                "WHERE item_id = ? AND lease_token = ? AND status = 'leased'",
+                ("failed" if exhausted else "pending", error, item["item_id"], item["lease_token"])
+            )
+            return cursor.rowcount == 1
+
+        # A failed re-triage keeps the provisional result and goes back in line
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT result FROM work_items WHERE item_id = ? AND lease_token = ? AND status = 'retriage_leased'",
+                (item["item_id"], item["lease_token"])
+            ).fetchone()
+            if row is not None:
+                if exhausted:
+                    self._abandon_retriage(conn, item["item_id"], row[0], error)
+                else:
+                    backoff = self.retriage_backoff * 2 ** (item["attempts"] - 1)
+                    conn.execute(
+                        "UPDATE work_items SET status = 'retriage', last_error = ?, retry_at = ?, "
+                        "lease_token = NULL, lease_expires = NULL WHERE item_id = ?",
+                        (error, time.time() + backoff, item["item_id"])
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def pending_count(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM work_items "
+            "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)",
+            (time.time(),)
+        ).fetchone()
+        return row[0]
+
+    def in_flight_count(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM work_items WHERE status = 'leased' AND lease_expires >= ?",
+            (time.time(),)
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Count items by status."""
+        rows = self._connection().execute(
+            "SELECT status, COUNT(*) FROM work_items GROUP BY status"
+        ).fetchall()
+        return dict(rows)
+
+    def results(self):
+        """Yield (item_id, result) pairs for every completed item, including provisional results."""
+        cursor = self._connection().execute(
+            "SELECT item_id, result FROM work_items "
+            "WHERE status IN ('done', 'retriage', 'retriage_leased') ORDER BY completed_at"
+        )
+        for item_id, result in cursor:
+            yield item_id, json.loads(result)
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
@@ -0,0 +1,310 @@
+import os
+import socket
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Dict, Any, List, Callable, Optional
+
+from insurance_triage.utils.work_queue import WorkQueue, SQLiteWorkQueue
+from insurance_triage.utils.structured_logging import correlation_context
+
+logger = logging.getLogger(__name__)
+
+
+class TriageWorker:
+    """
+    Pull emails from a shared work queue and triage them.
+
+    When the crew batches classification calls, the worker claims up to the
+    batcher's max_items emails at once so they share those calls; otherwise
+    it claims one email at a time.
+    """
+
+    def __init__(self, triage_crew, queue: WorkQueue, worker_id: str = None, poll_interval: float = 1.0):
+        """
+        Initialize the worker.
+
+        Args:
+            triage_crew: InsuranceEmailTriageCrew used to process each email
+            queue: Shared work queue to pull emails from
+            worker_id: Identifier recorded on claimed items. Defaults to host:pid
+            poll_interval: Seconds to wait before polling an empty queue again
+        """
+        self.triage_crew = triage_crew
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        batcher = getattr(triage_crew, "classification_batcher", None)
+        self.batch_size = batcher.max_items if batcher is not None else 1
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Ask the worker to exit after the current email."""
+        self._stop.set()
+
+    def _heartbeat(self, items: List[Dict[str, Any]], finished: set, done: threading.Event) -> None:
+        """Keep extending the leases on claimed items until each has been finished."""
+        interval = max(getattr(self.queue, "visibility_timeout", 300) / 3, 1)
+        item = None
+        try:
+            while not done.wait(interval):
+                for item in items:
+                    if item["item_id"] in finished:
+                        continue
+                    # An item finished while its lease was being extended is not lost
+                    if not self.queue.extend_lease(item) and item["item_id"] not in finished:
+                        logger.warning("Lease lost while processing queued email", extra={"fields": {
+                            "event": "lease_lost",
+                            "item_id": item["item_id"]
+                        }})
+                        finished.add(item["item_id"])
+        except Exception:
+            logger.exception("Lease heartbeat stopped", extra={"fields": {
+                "event": "heartbeat_failed",
+                "item_id": item["item_id"] if item is not None else None
+            }})
+        finally:
+            # The heartbeat thread's own connection is not reused by the next batch
+            self.queue.close()
+
+    def process_item(self, item: Dict[str, Any]) -> bool:
+        """
+        Triage one claimed item and acknowledge it.
+
+        Items claimed for re-triage always go through the full crew; their
+        result replaces the provisional one only if the crew succeeded.
+
+        Returns:
+            True if the result was committed, False if the lease was lost or
+            processing failed
+        """
+        return self.process_batch([item]) == 1
+
+    def process_batch(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Triage several claimed items, sharing the crew's batched stages.
+
+        The leases on all items are kept alive until each one is acknowledged
+        or failed.
+
+        Returns:
+            Number of items whose results were committed
+        """
+        finished = set()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(items, finished, done), daemon=True)
+        heartbeat.start()
+        try:
+            predictions = classification_outputs = [None] * len(items)
+            retriage = any(item.get("retriage", False) for item in items)
+            if not retriage and hasattr(self.triage_crew, "prepare_batch"):
+                try:
+                    predictions, classification_outputs = self.triage_crew.prepare_batch(
+                        [item["email"] for item in items], backlog=self.queue.pending_count()
+                    )
+                except Exception:
+                    # Each email still gets the crew's own classification
+                    logger.exception("Batched classification failed for claimed emails", extra={"fields": {
+                        "event": "batch_prepare_failed",
+                        "batch_size": len(items)
+                    }})
+
+            committed = 0
+            for item, prediction, classification_output in zip(items, predictions, classification_outputs):
+                committed += self._process_claimed(item, prediction, classification_output, finished)
+            return committed
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _process_claimed(self, item: Dict[str, Any], prediction: Optional[Dict[str, Any]],
+                         classification_output: Optional[str], finished: set) -> bool:
+        """Triage one item of a claimed batch and acknowledge or fail it."""
+        email = item["email"]
+        retriage = item.get("retriage", False)
+        metadata = {
+            "email_id": item["item_id"],
+            "sender": email.get("sender", "unknown@example.com"),
+            "received_time": email.get("received_time"),
+            "subject": email.get("subject", "Unknown Subject"),
+            "has_attachments": email.get("has_attachments", False)
+        }
+
+        try:
+            with correlation_context(item["item_id"]):
+                # Shed emails are parked in the queue rather than in this process's memory
+                result = self.triage_crew.process_single_email(
+                    email.get("content", ""), metadata, prediction=prediction,
+                    classification_output=classification_output, force_full_triage=retriage, defer_shed=False
+                )
+            if retriage and "error" in result:
+                raise RuntimeError(result["error"])
+        except Exception as e:
+            logger.exception("Triage failed for queued email", extra={"fields": {
+                "event": "queue_item_failed",
+                "item_id": item["item_id"],
+                "attempts": item["attempts"],
+                "retriage": retriage
+            }})
+            finished.add(item["item_id"])
+            self.queue.fail(item, str(e))
+            return False
+
+        if retriage:
+            result["retriage_of"] = item["item_id"]
+        finished.add(item["item_id"])
+        return self.queue.ack(item, result)
+
+    def run(self, max_items: int = None, stop_when_empty: bool = False) -> int:
+        """
+        Process emails until stopped.
+
+        Args:
+            max_items: Optional limit on the number of emails to process
+            stop_when_empty: Exit once the queue has nothing to claim and no
+                             other worker holds a lease that could still expire
+                             and be re-delivered
+
+        Returns:
+            Number of emails whose results were committed by this worker
+        """
+        processed = 0
+        while not self._stop.is_set():
+            if max_items is not None and processed >= max_items:
+                break
+
+            controller = getattr(self.triage_crew, "overload_controller", None)
+            if controller is not None:
+                controller.update_queue_depth(self.queue.pending_count())
+
+            item = self.queue.claim(self.worker_id)
+            if item is None:
+                # Idle time goes to re-triaging emails that were shed under load
+                if controller is not None and not controller.shedding:
+                    retriage_item = self.queue.claim_retriage(self.worker_id)
+                    if retriage_item is not None:
+                        self.process_item(retriage_item)
+                        continue
+                if stop_when_empty and self.queue.in_flight_count() == 0:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+
+            # Claim more emails while they are available so they share batched calls
+            items = [item]
+            limit = self.batch_size if max_items is None else min(self.batch_size, max_items - processed)
+            while len(items) < limit:
+                item = self.queue.claim(self.worker_id)
+                if item is None:
+                    break
+                items.append(item)
+
+            processed += self.process_batch(items)
+
+        return processed
+
+
+def _default_crew_factory(config_dir: str):
+    """Build the triage crew inside a worker process."""
+    # Imported here so each process builds its own crew after the fork
+    from insurance_triage.triage_crew import InsuranceEmailTriageCrew
+    return InsuranceEmailTriageCrew(config_dir)
+
+
+def _worker_main(slot: int, counts, crew_factory: Callable[[str], Any], queue_path: str, config_dir: str,
+                 queue_options: Dict[str, Any], poll_interval: float, stop_when_empty: bool,
+                 num_workers: int) -> None:
+    """Entry point for a worker process."""
+    queue = SQLiteWorkQueue(queue_path, **queue_options)
+    triage_crew = crew_factory(config_dir)
+    controller = getattr(triage_crew, "overload_controller", None)
+    if controller is not None:
+        # The whole pool drains the queue depth each worker observes
+        controller.num_workers = max(controller.num_workers, num_workers)
+    worker = TriageWorker(triage_crew, queue, poll_interval=poll_interval)
+    processed = worker.run(stop_when_empty=stop_when_empty)
+    with counts.get_lock():
+        counts[slot] += processed
+
+
+def run_worker_pool(queue_path: str, num_workers: int, config_dir: str = None,
+                    visibility_timeout: float = 300, max_attempts: int = 5,
+                    retriage_backoff: float = 30.0, poll_interval: float = 1.0, stop_when_empty: bool = True,
+                    max_restarts: int = 10, crew_factory: Callable[[str], Any] = None) -> List[int]:
+    """
+    Run several worker processes against one SQLite work queue.
+
+    More workers (on this host or on others sharing the queue file) can be
+    started at any time; they coordinate purely through leases in the queue.
+    A worker process that dies (crash, OOM kill) is logged and replaced; the
+    email it was holding is re-delivered once its lease expires.
+
+    Args:
+        queue_path: Path to the SQLite queue database
+        num_workers: Number of worker processes to start
+        config_dir: Optional directory for configuration files
+        visibility_timeout: Seconds a claimed item stays invisible to other workers
+        max_attempts: Deliveries after which an item is marked as failed
+        retriage_backoff: Seconds before a failed re-triage is retried
+        poll_interval: Seconds a worker waits before polling an empty queue again
+        stop_when_empty: Exit once the queue has been drained
+        max_restarts: Total number of dead workers replaced before giving up on them
+        crew_factory: Builds the triage crew from config_dir in each worker.
+                      Defaults to InsuranceEmailTriageCrew
+
+    Returns:
+        Number of emails committed by each worker slot. Emails committed by a
+        worker that later died are not counted
+    """
+    queue_options = {
+        "visibility_timeout": visibility_timeout,
+        "max_attempts": max_attempts,
+        "retriage_backoff": retriage_backoff
+    }
+    # Create the schema once up front so workers do not race to do it
+    SQLiteWorkQueue(queue_path, **queue_options).close()
+
+    crew_factory = crew_factory or _default_crew_factory
+    counts = multiprocessing.Array("i", num_workers)
+
+    def start(slot: int) -> multiprocessing.Process:
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(slot, counts, crew_factory, queue_path, config_dir, queue_options, poll_interval,
+                  stop_when_empty, num_workers),
+            name=f"triage-worker-{slot}"
+        )
+        process.start()
+        return process
+
+    workers = {slot: start(slot) for slot in range(num_workers)}
+    restarts = 0
+    while workers:
+        # Wake up as soon as any worker exits
+        wait([process.sentinel for process in workers.values()])
+        for slot, process in list(workers.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del workers[slot]
+            if process.exitcode == 0:
+                continue
+
+            logger.error("Worker process died", extra={"fields": {
+                "event": "worker_died",
+                "slot": slot,
+                "pid": process.pid,
+                "exitcode": process.exitcode
+            }})
+            if restarts < max_restarts:
+                restarts += 1
+                workers[slot] = start(slot)
+            else:
+                logger.error("Worker restart limit reached; not replacing worker", extra={"fields": {
+                    "event": "worker_not_restarted",
+                    "slot": slot,
+                    "max_restarts": max_restarts
+                }})
+
+    return list(counts)
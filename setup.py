@@ -10,6 +10,7 @@ setup(
         "langchain-openai>=0.0.2",
         "python-dotenv>=1.0.0",
         "pyyaml>=6.0",
+        "numpy>=1.22",
     ],
     author="Your Name",
     author_email="your.email@example.com",
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from insurance_triage.tasks.batch_classification import parse_batch_output
+
+
+def batch(*items):
+    return json.dumps(list(items))
+
+
+def test_entries_are_mapped_by_index():
+    output = "Here you go:\n" + batch({"index": 1, "email_type": "Claim"}, {"index": 0, "email_type": "Renewal"})
+    assert parse_batch_output(output, 2) == {0: {"email_type": "Renewal"}, 1: {"email_type": "Claim"}}
+
+
+def test_duplicate_index_drops_both_answers():
+    output = batch(
+        {"index": 0, "email_type": "Claim"},
+        {"index": 0, "email_type": "Renewal"},
+        {"index": 1, "email_type": "FNOL"}
+    )
+    assert parse_batch_output(output, 2) == {1: {"email_type": "FNOL"}}
+
+
+@pytest.mark.parametrize("index", [-1, 2, True, False, "0", 0.0, None])
+def test_out_of_range_and_non_int_indices_are_dropped(index):
+    assert parse_batch_output(batch({"index": index, "email_type": "Claim"}), 2) == {}
+
+
+def test_entries_without_email_type_or_not_objects_are_dropped():
+    assert parse_batch_output(batch({"index": 0, "urgency": "High"}, "Claim", [1]), 2) == {}
+
+
+@pytest.mark.parametrize("output", [None, "", "not json at all", "[index: 0, email_type: Claim]", '{"index": 0}'])
+def test_non_json_output_yields_nothing(output):
+    assert parse_batch_output(output, 2) == {}
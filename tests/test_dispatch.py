@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from insurance_triage.dispatch import DispatchStage, JSONLOutbox, SQLiteOutbox
+
+
+def make_result(email_id, team="Claims", manual_review=False):
+    return {
+        "email_metadata": {"email_id": email_id},
+        "routing": {"team": team, "requires_manual_review": manual_review}
+    }
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def stage(request, tmp_path):
+    if request.param == "sqlite":
+        outbox = SQLiteOutbox(str(tmp_path / "outbox.db"))
+    else:
+        outbox = JSONLOutbox(str(tmp_path / "outbox"))
+    stage = DispatchStage(outbox)
+    yield stage
+    stage.close()
+
+
+def test_replayed_results_are_not_written_twice(stage):
+    results = [make_result("e1"), make_result("e2", team="Billing")]
+    assert stage.dispatch(results) == {"Claims": 1, "Billing": 1}
+    assert stage.dispatch(results) == {"Claims": 0, "Billing": 0}
+
+
+def test_review_flag_change_does_not_duplicate_an_email(stage):
+    assert stage.dispatch([make_result("e1")]) == {"Claims": 1}
+    assert stage.dispatch([make_result("e1", manual_review=True)]) == {"Claims": 0}
+
+
+def test_retriage_result_gets_its_own_entry(stage):
+    stage.dispatch([make_result("e1")])
+    assert stage.dispatch([{**make_result("e1"), "retriage_of": "e1"}]) == {"Claims": 1}
+
+
+def test_jsonl_outbox_keeps_one_file_per_team_with_flag_per_line(tmp_path):
+    directory = tmp_path / "outbox"
+    stage = DispatchStage(JSONLOutbox(str(directory)))
+    stage.dispatch([make_result("e1"), make_result("e2", manual_review=True)])
+
+    assert [path.name for path in directory.iterdir()] == ["claims.jsonl"]
+    lines = [json.loads(line) for line in (directory / "claims.jsonl").read_text().splitlines()]
+    assert [(line["dispatch_key"], line["requires_manual_review"]) for line in lines] == [("e1", False), ("e2", True)]
+
+    # A new outbox instance reloads the keys already on disk
+    replay = DispatchStage(JSONLOutbox(str(directory)))
+    assert replay.dispatch([make_result("e2")]) == {"Claims": 0}
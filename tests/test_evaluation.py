@@ -0,0 +1,52 @@
+import threading
+
+from insurance_triage.evaluation import RecordedCrewTier, ShadowEvaluator, record_crew_responses, rules_tier
+
+CORPUS = [
+    {"id": 1, "content": "Please renew policy ABC-1", "email_type": "policy_renewal", "urgency": "Normal"},
+    {"id": 2, "content": "crash", "email_type": "claim", "urgency": "High"},
+]
+
+
+class FakeCrew:
+    def __init__(self):
+        self.calls = []
+
+    def process_single_email(self, content, metadata=None, force_full_triage=False):
+        self.calls.append(force_full_triage)
+        if content == "crash":
+            return {"error": "Error running crew: timeout"}
+        return {
+            "triage_tier": "crew",
+            "classification": {"email_type": "policy_renewal", "urgency": "Normal"},
+            "token_usage": {"total_tokens": 120}
+        }
+
+
+def test_recorded_crew_errors_are_counted(tmp_path):
+    path = str(tmp_path / "crew.jsonl")
+    crew = FakeCrew()
+    record_crew_responses(crew, CORPUS, path)
+    assert crew.calls == [True, True]
+
+    tier = RecordedCrewTier(path)
+    assert tier.recordings["1"]["triage_tier"] == "crew"
+
+    report = ShadowEvaluator({"crew": tier}).run(CORPUS)
+    crew_report = report["tiers"]["crew"]
+    assert crew_report["errors"] == 1
+    assert crew_report["email_type"]["accuracy"] == 0.5
+    assert crew_report["tokens"]["total"] == 120
+
+
+def test_local_tiers_run_sequentially_on_fresh_documents():
+    threads = set()
+
+    def local_tier(email):
+        threads.add(threading.get_ident())
+        return rules_tier(email)
+
+    evaluator = ShadowEvaluator({"first": rules_tier, "second": local_tier}, max_workers=8)
+    report = evaluator.run(CORPUS * 10)
+    assert threads == {threading.get_ident()}
+    assert report["tiers"]["first"]["email_type"] == report["tiers"]["second"]["email_type"]
@@ -0,0 +1,21 @@
+from insurance_triage.utils.load_shedding import OverloadController
+
+
+def test_estimated_wait_is_shared_between_workers():
+    controller = OverloadController(latency_slo_seconds=100, initial_latency_seconds=10.0, num_workers=4)
+    controller.update_queue_depth(20)
+    assert controller.estimated_wait_seconds() == 50
+    assert not controller.shedding
+
+    controller.update_queue_depth(60)
+    assert controller.shedding
+
+
+def test_shedding_recovers_below_lower_level():
+    controller = OverloadController(latency_slo_seconds=100, initial_latency_seconds=10.0)
+    controller.update_queue_depth(11)
+    assert controller.shedding
+    controller.update_queue_depth(8)
+    assert controller.shedding
+    controller.update_queue_depth(4)
+    assert not controller.shedding
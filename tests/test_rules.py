@@ -0,0 +1,124 @@
+import os
+import shutil
+import time
+
+import pytest
+import yaml
+
+from insurance_triage.utils import rules as rules_module
+from insurance_triage.utils.config_loader import ConfigLoader
+from insurance_triage.utils.rules import CompiledRules, RulesRegistry, compile_keywords, set_rules_registry
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "rules.yaml")
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    shutil.copy(RULES_FILE, tmp_path / "rules.yaml")
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def restore_registry():
+    previous = rules_module._registry
+    yield
+    rules_module._registry = previous
+
+
+def write_rules(config_dir, update):
+    with open(RULES_FILE) as f:
+        rules_config = yaml.safe_load(f)
+    update(rules_config)
+    path = config_dir / "rules.yaml"
+    path.write_text(yaml.safe_dump(rules_config))
+    # Make sure the change is visible even on coarse mtime filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_compile_keywords_matches_any_keyword():
+    matcher = compile_keywords(["claim", "claim report", "FNOL"])
+    assert matcher.search("new claim report filed")
+    assert matcher.search("fnol attached")
+    assert not matcher.search("renewal")
+    assert not compile_keywords([]).search("anything")
+
+
+def test_compiled_rules_rejects_missing_sections():
+    with open(RULES_FILE) as f:
+        rules_config = yaml.safe_load(f)
+    rules = CompiledRules(rules_config)
+    assert rules.default_team == rules_config["routing"]["default_team"]
+
+    del rules_config["routing"]
+    with pytest.raises(ValueError):
+        CompiledRules(rules_config)
+
+
+def test_reload_swaps_in_changed_rules(config_dir):
+    registry = RulesRegistry(ConfigLoader(str(config_dir)))
+    original = registry.current
+    assert not registry.reload_if_changed()
+
+    write_rules(config_dir, lambda r: r["routing"].update(default_team="Triage Desk"))
+    assert registry.reload_if_changed()
+    assert registry.current.default_team == "Triage Desk"
+    assert registry.current.version > original.version
+
+
+@pytest.mark.parametrize("contents", ["routing: [unclosed", "email_types: []\n", "- just\n- a list\n"])
+def test_bad_rules_file_keeps_previous_rules(config_dir, contents):
+    registry = RulesRegistry(ConfigLoader(str(config_dir)))
+    original = registry.current
+
+    path = config_dir / "rules.yaml"
+    path.write_text(contents)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert not registry.reload_if_changed()
+    assert registry.current is original
+
+
+def test_unexpected_reload_error_keeps_previous_rules(config_dir, monkeypatch):
+    loader = ConfigLoader(str(config_dir))
+    registry = RulesRegistry(loader)
+    original = registry.current
+
+    def broken_load_rules(filename):
+        raise OSError("permission denied")
+
+    monkeypatch.setattr(loader, "load_rules", broken_load_rules)
+    write_rules(config_dir, lambda r: None)
+    assert not registry.reload_if_changed()
+    assert registry.current is original
+
+
+def test_watcher_survives_unexpected_errors(config_dir, monkeypatch):
+    registry = RulesRegistry(ConfigLoader(str(config_dir)))
+    calls = []
+
+    def failing_reload():
+        calls.append(1)
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(registry, "reload_if_changed", failing_reload)
+    registry.start_watching(0.01)
+    try:
+        time.sleep(0.2)
+        assert len(calls) > 1
+        assert registry._watcher.is_alive()
+    finally:
+        registry.stop_watching()
+
+
+def test_replacing_registry_stops_previous_watcher(config_dir):
+    first = RulesRegistry(ConfigLoader(str(config_dir)))
+    set_rules_registry(first)
+    first.start_watching(0.01)
+    watcher = first._watcher
+
+    second = RulesRegistry(ConfigLoader(str(config_dir)))
+    set_rules_registry(second)
+    assert not watcher.is_alive()
+    assert first._watcher is None
@@ -0,0 +1,138 @@
+import os
+import json
+import random
+import logging
+
+import pytest
+import yaml
+
+# The crew path needs the CrewAI stack; the LLM itself is stubbed out below
+pytest.importorskip("crewai")
+pytest.importorskip("langchain")
+
+from insurance_triage import triage_crew
+from insurance_triage.triage_crew import InsuranceEmailTriageCrew
+from insurance_triage.tools.emails_tools import EmailTools
+from insurance_triage.utils.structured_logging import NonBlockingQueueHandler, shutdown_logging
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'config')
+
+# Scale up with SOAK_EMAILS for a long soak; the default keeps the suite quick
+SOAK_EMAILS = int(os.environ.get("SOAK_EMAILS", 1500))
+SAMPLE_EVERY = max(SOAK_EMAILS // 6, 1)
+MAX_GROWTH_MIB = 2.0
+
+SUBJECTS = [
+    "Claim Notification - Policy {policy}",
+    "URGENT - First Notice of Loss - Policy {policy}",
+    "Policy Renewal - Policy Number {policy}",
+    "New Business Application - Commercial Property",
+    "Endorsement request for Policy {policy}",
+    "Question about my cover",
+]
+
+BODIES = [
+    "Water damage occurred due to a burst pipe in our warehouse. Claim ID: CLM{n}",
+    "This is urgent, an incident occurred today and we need help immediately.",
+    "Our policy is due for renewal. Renewal Date: 01/05/2025",
+    "Please find our submission and risk details attached for a quote request.",
+    "We would like to amend coverage and update policy limits.",
+    "I am unhappy with the delay and would like to raise a complaint about my personal data.",
+]
+
+# Minimal task set, in the order _run_crew formats the outputs
+SOAK_TASKS = {
+    "classification_task": {"agent": "classification_agent", "description": "Classify the email.",
+                            "expected_output": "JSON classification"},
+    "insights_task": {"agent": "insights_agent", "description": "Summarize the email and suggest a response.",
+                      "expected_output": "Summary and template", "context": ["classification_task"]},
+    "compliance_task": {"agent": "compliance_agent", "description": "List compliance issues.",
+                        "expected_output": "List of issues", "context": ["classification_task"]},
+    "routing_task": {"agent": "routing_agent", "description": "Route the email.",
+                     "expected_output": "JSON routing", "context": ["classification_task", "compliance_task"]},
+}
+
+
+def synthetic_email(rng: random.Random, n: int) -> str:
+    """Build a random but realistic-looking insurance email."""
+    policy = f"POL{rng.randint(100000, 999999)}"
+    subject = rng.choice(SUBJECTS).format(policy=policy)
+    body = " ".join(rng.choice(BODIES).format(n=n) for _ in range(rng.randint(2, 6)))
+    padding = " ".join(rng.choice(["please", "regards", "kindly", "advise", "thanks"]) for _ in range(rng.randint(20, 400)))
+    return (
+        f"Subject: {subject}\n\nPolicy Number: {policy}\nInsured Name: Client {n % 5000},\n\n"
+        f"{body}\n\n{padding}\n\nRegards,\nSender {n}"
+    )
+
+
+def fake_kickoff(self):
+    """Stand-in for Crew.kickoff: answer every task from the rules instead of an LLM."""
+    email = self.tasks[0].description.split("Email Content:\n", 1)[-1]
+    triage = EmailTools.triage_email(email)
+    outputs = [
+        json.dumps(triage["classification"]),
+        f"Summary: {triage['summary']}\nTemplate: {triage['suggested_response']}",
+        json.dumps(triage["compliance_issues"]),
+        json.dumps(triage["routing"]),
+    ]
+    for task, output in zip(self.tasks, outputs):
+        task.output = output
+    return outputs[-1]
+
+
+@pytest.fixture
+def bounded_crew(tmp_path, monkeypatch):
+    """A crew built from the shipped config with bounded mode and profiling on and no LLM calls."""
+    for name in os.listdir(CONFIG_DIR):
+        if name.endswith(".yaml"):
+            (tmp_path / name).write_text(open(os.path.join(CONFIG_DIR, name)).read())
+
+    config = yaml.safe_load((tmp_path / "config.yaml").read_text())
+    config["memory"] = {
+        "bounded_mode": True,
+        "gc_every": 250,
+        "profiling": {"enabled": True, "sample_every": SAMPLE_EVERY, "top_n": 5, "tracemalloc": True}
+    }
+    config["logging"] = {**config.get("logging", {}), "output": os.devnull}
+    config["rules"] = {**config.get("rules", {}), "hot_reload": False}
+    # Every email goes through the crew path
+    for section in ("classifier", "classification_batching", "load_shedding", "dispatch"):
+        config[section] = {**config.get(section, {}), "enabled": False}
+    (tmp_path / "config.yaml").write_text(yaml.safe_dump(config))
+    # The shipped tasks.yaml does not define tasks with agents
+    (tmp_path / "tasks.yaml").write_text(yaml.safe_dump(SOAK_TASKS, sort_keys=False))
+
+    monkeypatch.setenv("OPENAI_API_KEY", "soak-test")
+    monkeypatch.setattr(triage_crew.Crew, "kickoff", fake_kickoff)
+
+    crew = InsuranceEmailTriageCrew(str(tmp_path))
+    yield crew
+    crew.memory_monitor.stop()
+    shutdown_logging()
+
+
+def test_bounded_mode_memory_stays_flat(bounded_crew):
+    # pytest attaches its capture handlers, which keep every record, to
+    # non-propagating loggers; what they retain is not the crew's growth
+    package_logger = logging.getLogger("insurance_triage")
+    for handler in list(package_logger.handlers):
+        if not isinstance(handler, NonBlockingQueueHandler):
+            package_logger.removeHandler(handler)
+
+    rng = random.Random(42)
+    for n in range(SOAK_EMAILS):
+        metadata = {"sender": f"broker{n % 50}@example.com", "received_time": f"2025-01-01T00:00:{n}",
+                    "subject": f"Soak email {n}", "has_attachments": False}
+        result = bounded_crew.process_single_email(synthetic_email(rng, n), metadata)
+        assert result.get("triage_tier") == "crew" and result["routing"]["team"], result
+        # Bounded mode must not keep tasks (and their email bodies) between emails
+        assert not bounded_crew.task_factory.tasks_dict
+        assert not any(agent.verbose for agent in bounded_crew.agents)
+
+    samples = list(bounded_crew.memory_monitor.samples)
+    assert len(samples) >= 2
+
+    # Compare after warm-up (first sample) against the end of the run
+    growth_mib = (samples[-1]["traced_current_bytes"] - samples[0]["traced_current_bytes"]) / 2**20
+    top = ", ".join(allocator["location"] for allocator in samples[-1]["top_allocators"])
+    assert growth_mib <= MAX_GROWTH_MIB, f"traced memory grew {growth_mib:.2f} MiB; top allocators: {top}"
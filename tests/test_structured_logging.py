@@ -0,0 +1,37 @@
+import json
+import queue
+import logging
+
+from insurance_triage.utils import structured_logging
+from insurance_triage.utils.structured_logging import configure_logging, dropped_records, shutdown_logging
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_relative_output_resolves_against_base_dir(tmp_path):
+    configure_logging({"output": "logs/triage.jsonl"}, str(tmp_path))
+    logging.getLogger("insurance_triage.test").info("hello", extra={"fields": {"event": "greeting"}})
+    shutdown_logging()
+
+    [record] = read_records(tmp_path / "logs" / "triage.jsonl")
+    assert record["message"] == "hello" and record["event"] == "greeting"
+
+
+def test_dropped_records_are_reported_at_shutdown(tmp_path):
+    configure_logging({"output": str(tmp_path / "triage.jsonl")})
+    handler = structured_logging._handler
+    listener_queue = handler.queue
+
+    # Point the handler at a full queue so the next record is dropped
+    handler.queue = queue.Queue(maxsize=1)
+    handler.queue.put_nowait(None)
+    logging.getLogger("insurance_triage.test").warning("lost")
+    assert dropped_records() == 1
+    handler.queue = listener_queue
+
+    shutdown_logging()
+    assert dropped_records() == 0
+    [record] = read_records(tmp_path / "triage.jsonl")
+    assert record["event"] == "log_records_dropped" and record["dropped"] == 1
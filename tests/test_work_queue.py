@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from insurance_triage.utils.work_queue import SQLiteWorkQueue, make_email_id
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "queue.db")
+
+
+def test_make_email_id_prefers_message_id_and_is_stable():
+    email = {"sender": "a@example.com", "subject": "Claim", "content": "Water damage"}
+    assert make_email_id(email) == make_email_id(dict(email))
+    assert make_email_id({**email, "content": "Fire damage"}) != make_email_id(email)
+    assert make_email_id({**email, "message_id": "<m1>"}) == "<m1>"
+
+
+def test_enqueue_is_idempotent(queue_path):
+    queue = SQLiteWorkQueue(queue_path)
+    assert queue.enqueue({"content": "x"})
+    assert not queue.enqueue({"content": "x"})
+    assert queue.pending_count() == 1
+
+
+def test_claim_ack_completes_item(queue_path):
+    queue = SQLiteWorkQueue(queue_path)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    item = queue.claim("w1")
+    assert item["item_id"] == "e1" and item["attempts"] == 1
+    assert queue.claim("w2") is None
+    assert queue.in_flight_count() == 1
+
+    assert queue.ack(item, {"ok": True})
+    assert queue.stats() == {"done": 1}
+    assert list(queue.results()) == [("e1", {"ok": True})]
+
+
+def test_expired_lease_is_redelivered_and_stale_ack_rejected(queue_path):
+    queue = SQLiteWorkQueue(queue_path, visibility_timeout=0)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    first = queue.claim("w1")
+    time.sleep(0.01)
+    second = queue.claim("w2")
+    assert second["item_id"] == "e1" and second["attempts"] == 2
+
+    # Only the current lease holder can commit or extend
+    assert not queue.ack(first, {"by": "w1"})
+    assert not queue.extend_lease(first)
+    assert queue.ack(second, {"by": "w2"})
+    assert list(queue.results()) == [("e1", {"by": "w2"})]
+
+
+def test_fail_returns_item_to_queue_until_max_attempts(queue_path):
+    queue = SQLiteWorkQueue(queue_path, max_attempts=2)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    assert queue.fail(queue.claim("w1"), "boom")
+    assert queue.stats() == {"pending": 1}
+
+    assert queue.fail(queue.claim("w1"), "boom again")
+    assert queue.stats() == {"failed": 1}
+    assert queue.claim("w1") is None
+
+
+def test_expired_lease_past_max_attempts_is_parked_as_failed(queue_path):
+    queue = SQLiteWorkQueue(queue_path, visibility_timeout=0, max_attempts=1)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    queue.claim("w1")
+    time.sleep(0.01)
+    assert queue.claim("w2") is None
+    assert queue.stats() == {"failed": 1}
+    assert queue.in_flight_count() == 0
+
+
+def test_extend_lease_keeps_item_invisible(queue_path):
+    queue = SQLiteWorkQueue(queue_path, visibility_timeout=0.2)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    item = queue.claim("w1")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.extend_lease(item)
+    assert queue.claim("w2") is None
+
+
+def test_provisional_result_is_parked_for_retriage(queue_path):
+    queue = SQLiteWorkQueue(queue_path)
+    queue.enqueue({"content": "x"}, item_id="e1")
+
+    assert queue.ack(queue.claim("w1"), {"triage_tier": "rules", "retriage_pending": True})
+    assert queue.stats() == {"retriage": 1}
+    # Provisional results are visible until the crew replaces them
+    assert [item_id for item_id, _ in queue.results()] == ["e1"]
+
+    item = queue.claim_retriage("w1")
+    assert item["retriage"]
+    assert queue.ack(item, {"triage_tier": "crew"})
+    assert list(queue.results()) == [("e1", {"triage_tier": "crew"})]
+
+
+def test_retriage_attempts_are_counted_separately(queue_path):
+    queue = SQLiteWorkQueue(queue_path, max_attempts=2, retriage_backoff=0)
+    queue.enqueue({"content": "x"}, item_id="e1")
+    queue.fail(queue.claim("w1"), "boom")
+    # Second and last delivery parks a provisional result
+    assert queue.ack(queue.claim("w1"), {"triage_tier": "rules", "retriage_pending": True})
+
+    item = queue.claim_retriage("w1")
+    assert item["attempts"] == 1
+    assert queue.fail(item, "crew down")
+    assert queue.stats() == {"retriage": 1}
+
+
+def test_failed_retriage_backs_off(queue_path):
+    queue = SQLiteWorkQueue(queue_path, retriage_backoff=0.3)
+    queue.enqueue({"content": "x"}, item_id="e1")
+    queue.ack(queue.claim("w1"), {"triage_tier": "rules", "retriage_pending": True})
+
+    queue.fail(queue.claim_retriage("w1"), "crew down")
+    assert queue.claim_retriage("w1") is None
+    time.sleep(0.4)
+    assert queue.claim_retriage("w1")["attempts"] == 2
+
+
+def test_retriage_is_abandoned_after_max_attempts(queue_path):
+    queue = SQLiteWorkQueue(queue_path, max_attempts=2, retriage_backoff=0)
+    queue.enqueue({"content": "x"}, item_id="e1")
+    queue.ack(queue.claim("w1"), {"triage_tier": "rules", "retriage_pending": True})
+
+    queue.fail(queue.claim_retriage("w1"), "crew down")
+    queue.fail(queue.claim_retriage("w1"), "crew down")
+    assert queue.claim_retriage("w1") is None
+    [(item_id, result)] = list(queue.results())
+    assert result["triage_tier"] == "rules"
+    assert not result["retriage_pending"]
@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+
+from insurance_triage.utils.work_queue import SQLiteWorkQueue
+from insurance_triage.worker import TriageWorker, run_worker_pool
+
+
+class CrashOnceCrew:
+    """Stand-in crew whose process dies the first time it sees a 'crash' email."""
+
+    overload_controller = None
+
+    def __init__(self, marker_dir: str):
+        self.marker = os.path.join(marker_dir, "crashed")
+
+    def process_single_email(self, email_content, email_metadata=None, **kwargs):
+        if email_content == "crash" and not os.path.exists(self.marker):
+            open(self.marker, "w").close()
+            os._exit(1)
+        return {"email_metadata": email_metadata, "content": email_content}
+
+
+def test_worker_pool_replaces_dead_worker_and_finishes_queue(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    queue = SQLiteWorkQueue(queue_path, visibility_timeout=1)
+    for content in ["a", "crash", "b", "c"]:
+        queue.enqueue({"content": content})
+
+    counts = run_worker_pool(
+        queue_path, 2, config_dir=str(tmp_path), visibility_timeout=1,
+        poll_interval=0.1, crew_factory=CrashOnceCrew
+    )
+
+    assert os.path.exists(tmp_path / "crashed")
+    assert queue.stats() == {"done": 4}
+    assert sorted(result["content"] for _, result in queue.results()) == ["a", "b", "c", "crash"]
+    assert sum(counts) <= 4
+
+
+class SlowCrew:
+    overload_controller = None
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def process_single_email(self, email_content, email_metadata=None, **kwargs):
+        time.sleep(self.seconds)
+        return {"email_metadata": email_metadata}
+
+
+def test_heartbeat_keeps_slow_item_leased(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    queue = SQLiteWorkQueue(queue_path, visibility_timeout=1.5)
+    queue.enqueue({"content": "slow"})
+    item = queue.claim("w1")
+
+    # The crew takes longer than the visibility timeout
+    worker = TriageWorker(SlowCrew(2.5), queue)
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(acked=worker.process_item(item)))
+    thread.start()
+    time.sleep(2.0)
+    assert SQLiteWorkQueue(queue_path).claim("w2") is None
+    thread.join()
+
+    assert outcome["acked"]
+    assert queue.stats() == {"done": 1}
+
+
+class BatchingCrew:
+    """Stand-in crew whose classification stage is batched in groups of three."""
+
+    overload_controller = None
+
+    class classification_batcher:
+        max_items = 3
+
+    def __init__(self):
+        self.batches = []
+        self.outputs = []
+
+    def prepare_batch(self, emails, backlog=0):
+        self.batches.append(len(emails))
+        outputs = [f"classified {email['content']}" for email in emails]
+        return [None] * len(emails), outputs
+
+    def process_single_email(self, email_content, email_metadata=None, classification_output=None, **kwargs):
+        self.outputs.append(classification_output)
+        return {"email_metadata": email_metadata}
+
+
+def test_worker_claims_batches_for_classification(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    for content in "abcde":
+        queue.enqueue({"content": content})
+
+    crew = BatchingCrew()
+    worker = TriageWorker(crew, queue, poll_interval=0.01)
+    assert worker.run(stop_when_empty=True) == 5
+
+    assert crew.batches == [3, 2]
+    assert crew.outputs == [f"classified {content}" for content in "abcde"]
+    assert queue.stats() == {"done": 5}